@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Peak memory of transcript cleaning: streaming pipeline vs. whole-text cleaning.
+
+"materialized" is the regex chain the cleaner tool ran over the whole transcript
+before the pipeline existed; tests/test_pipeline.py checks both give the same text.
+
+Each measurement runs in a fresh subprocess with synthetic segments, so peak RSS
+(ru_maxrss) only reflects that run. Usage: python bench_memory.py [segment counts...]
+"""
+
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEGMENT = "um so 00:12 like this is [01:02] sort of a sample caption line you know."
+# write buffered output in chunks of roughly this many characters
+WRITE_CHUNK_SIZE = 64 * 1024
+
+
+def synthetic_segments(count):
+    for i in range(count):
+        yield f"{SEGMENT} {i}"
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def write_stream(chunks, target):
+    """Write chunks to an open text file as they arrive. Returns characters written."""
+    written = 0
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= WRITE_CHUNK_SIZE:
+            target.write("".join(buffer))
+            written += buffered
+            buffer = []
+            buffered = 0
+    if buffer:
+        target.write("".join(buffer))
+        written += buffered
+    return written
+
+
+def baseline_clean(text):
+    """The old whole-text cleaner: timestamps, fillers, then whitespace, each over all of text."""
+    from youtube_summarizer.pipeline import FILLER_PATTERNS, TIMESTAMP_PATTERNS
+
+    for pattern in TIMESTAMP_PATTERNS + FILLER_PATTERNS:
+        text = pattern.sub("", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
+    text = re.sub(r"\.\s+", ".\n", text)
+    return text.strip() + "\n"
+
+
+def run_child(mode, count):
+    from youtube_summarizer.pipeline import clean_segments
+
+    with tempfile.NamedTemporaryFile("w", suffix=".md", delete=True, encoding="utf-8") as out:
+        if mode == "streaming":
+            write_stream(clean_segments(synthetic_segments(count)), out)
+        else:
+            # what the tools did before: join everything, then clean the full text
+            text = "\n".join(list(synthetic_segments(count)))
+            out.write(baseline_clean(text))
+    print(f"{peak_rss_mb():.1f}")
+
+
+def measure(mode, count):
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child", mode, str(count)], text=True
+    )
+    return float(output.strip())
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]))
+        return
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'segments':>10} {'text MB':>8} {'streaming MB':>13} {'materialized MB':>16}")
+    for count in sizes:
+        text_mb = count * (len(SEGMENT) + 8) / (1024 * 1024)
+        streaming = measure("streaming", count)
+        materialized = measure("materialized", count)
+        print(f"{count:>10} {text_mb:>8.1f} {streaming:>13.1f} {materialized:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
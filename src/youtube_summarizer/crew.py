@@ -1,13 +1,16 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from crewai.tasks.task_output import TaskOutput
+from typing import List, Dict, Tuple, Callable, Optional
 from dotenv import load_dotenv
 
 # Local tools
 from .tools.transcript_tool import EnhancedTranscriptTool
 from .tools.text_cleaner_tool import TranscriptCleanerTool
 from .tools.google_docs_tool import GoogleDocsIntegrationTool
+from .tracing import JobTrace
+from .routing import RoutedLLM, build_llm
 
 load_dotenv()
 
@@ -18,11 +21,16 @@ class YouTubeSummarizer():
     agents: List[BaseAgent]
     tasks: List[Task]
 
+    def _llm(self, agent_name: str) -> Optional[RoutedLLM]:
+        """Routed LLM from the agent's `model` block in agents.yaml (None keeps the default model)."""
+        return build_llm(self.agents_config[agent_name].get('model'))
+
     # Agents
     @agent
     def transcript_extractor(self) -> Agent:
         return Agent(
             config=self.agents_config['transcript_extractor'],
+            llm=self._llm('transcript_extractor'),
             verbose=True,
             tools=[EnhancedTranscriptTool()]
         )
@@ -31,6 +39,7 @@ class YouTubeSummarizer():
     def text_cleaner(self) -> Agent:
         return Agent(
             config=self.agents_config['text_cleaner'],
+            llm=self._llm('text_cleaner'),
             verbose=True,
             tools=[TranscriptCleanerTool()]
         )
@@ -39,6 +48,7 @@ class YouTubeSummarizer():
     def summary_writer(self) -> Agent:
         return Agent(
             config=self.agents_config['summary_writer'],
+            llm=self._llm('summary_writer'),
             verbose=True
         )
 
@@ -46,6 +56,7 @@ class YouTubeSummarizer():
     def quality_checker(self) -> Agent:
         return Agent(
             config=self.agents_config['quality_checker'],
+            llm=self._llm('quality_checker'),
             verbose=True
         )
 
@@ -53,6 +64,7 @@ class YouTubeSummarizer():
     def docs_uploader(self) -> Agent:
         return Agent(
             config=self.agents_config['docs_uploader'],
+            llm=self._llm('docs_uploader'),
             verbose=True,
             tools=[GoogleDocsIntegrationTool()]
         )
@@ -96,3 +108,61 @@ class YouTubeSummarizer():
             process=Process.sequential,
             verbose=True
         )
+
+    def stage_tasks(self) -> List[Tuple[str, Task]]:
+        """Tasks in pipeline order, paired with the checkpoint stage they produce."""
+        return [
+            ('transcript', self.transcript_task()),
+            ('cleaned', self.cleaning_task()),
+            ('summary', self.summarize_task()),
+            ('review', self.review_task()),
+            ('publish', self.gdocs_publish_task()),
+        ]
+
+    def resumable_crew(self, checkpoints: Dict[str, str],
+                       on_checkpoint: Optional[Callable[[str, str], None]] = None,
+                       until: Optional[str] = None,
+                       trace: Optional[JobTrace] = None) -> Optional[Crew]:
+        """Crew that only runs stages missing from checkpoints, optionally stopping after `until`.
+
+        Completed stages get their saved output attached so later tasks still see it
+        as context. Returns None when there is nothing left to run.
+        """
+        stage_tasks = self.stage_tasks()
+        if until:
+            stage_names = [stage for stage, _ in stage_tasks]
+            stage_tasks = stage_tasks[:stage_names.index(until) + 1]
+
+        pending = []
+        for stage, stage_task in stage_tasks:
+            if stage in checkpoints:
+                stage_task.output = TaskOutput(
+                    description=stage_task.description,
+                    name=stage_task.name,
+                    agent=stage_task.agent.role,
+                    raw=checkpoints[stage]
+                )
+            else:
+                if on_checkpoint:
+                    stage_task.callback = lambda output, stage=stage: on_checkpoint(stage, output.raw)
+                pending.append(stage_task)
+
+        if not pending:
+            return None
+
+        agents = []
+        agent_roles = set()
+        for pending_task in pending:
+            if pending_task.agent.role not in agent_roles:
+                agents.append(pending_task.agent)
+                agent_roles.add(pending_task.agent.role)
+
+        resumed = Crew(
+            agents=agents,
+            tasks=pending,
+            process=Process.sequential,
+            verbose=True
+        )
+        if trace:
+            trace.instrument(resumed)
+        return resumed
@@ -0,0 +1,178 @@
+"""MinHash/LSH index of cleaned transcripts, used to reuse summaries across re-uploads and mirrors.
+
+Signatures are banded into LSH keys stored in SQLite with a primary-key index, so a
+lookup is one indexed IN query over BANDS keys regardless of how many transcripts
+are indexed. Candidates are then verified by comparing their full signatures.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+import mmh3
+import numpy as np
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a bucket
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+# texts with fewer distinct shingles than this (music-only captions, error messages, a few
+# words) all get near-identical signatures, so they are neither indexed nor matched
+MIN_SHINGLES = 50
+# hash shingles in blocks so long transcripts don't build a huge (shingles x NUM_PERM) matrix
+SHINGLE_BLOCK = 4096
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# fixed seed: signatures must stay comparable across processes and restarts
+_rng = np.random.RandomState(1)
+# a < 2**31 and 32-bit shingle hashes keep a * h + b inside uint64
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL,
+    summary TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    bucket INTEGER NOT NULL,
+    doc_id TEXT NOT NULL,
+    PRIMARY KEY (bucket, doc_id)
+) WITHOUT ROWID;
+"""
+
+
+def _shingles(text: str):
+    words = text.lower().split()
+    if len(words) < SHINGLE_WORDS:
+        if words:
+            yield " ".join(words)
+        return
+    for i in range(len(words) - SHINGLE_WORDS + 1):
+        yield " ".join(words[i:i + SHINGLE_WORDS])
+
+
+def minhash_signature(text: str) -> Optional[np.ndarray]:
+    """NUM_PERM-value MinHash signature of the text's word shingles.
+
+    None if the text has fewer than MIN_SHINGLES distinct shingles to compare on.
+    """
+    signature = np.full(NUM_PERM, MAX_HASH, dtype=np.uint64)
+    block = []
+    # distinct shingle hashes, only tracked until there are enough
+    distinct = set()
+    for shingle in _shingles(text):
+        shingle_hash = mmh3.hash(shingle, signed=False)
+        if distinct is not None:
+            distinct.add(shingle_hash)
+            if len(distinct) >= MIN_SHINGLES:
+                distinct = None
+        block.append(shingle_hash)
+        if len(block) >= SHINGLE_BLOCK:
+            signature = np.minimum(signature, _block_minimum(block))
+            block = []
+    if distinct is not None:
+        return None
+    if block:
+        signature = np.minimum(signature, _block_minimum(block))
+    return signature
+
+
+def _block_minimum(hashes: List[int]) -> np.ndarray:
+    values = np.array(hashes, dtype=np.uint64)[:, np.newaxis]
+    permuted = ((values * _PERM_A + _PERM_B) % MERSENNE_PRIME) & MAX_HASH
+    return permuted.min(axis=0)
+
+
+def lsh_buckets(signature: np.ndarray) -> List[int]:
+    """One bucket key per band; the band number is mixed in so bands never collide."""
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        buckets.append(mmh3.hash64(rows, seed=band, signed=True)[0])
+    return buckets
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class DuplicateIndex:
+    """Persistent near-duplicate index keyed by video id, storing each video's summary once known."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('DEDUP_INDEX_PATH', 'dedup.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def add(self, doc_id: str, text: str, summary: Optional[str] = None) -> bool:
+        """Index (or re-index) a cleaned transcript. An existing summary is kept unless a new one is given.
+
+        Returns False, indexing nothing, when the text is too short to compare.
+        """
+        signature = minhash_signature(text)
+        if signature is None:
+            return False
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM lsh_buckets WHERE doc_id = ?", (doc_id,))
+            self._conn.execute(
+                "INSERT INTO documents (doc_id, signature, summary, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (doc_id) DO UPDATE SET signature = excluded.signature, "
+                "summary = COALESCE(excluded.summary, documents.summary), updated_at = excluded.updated_at",
+                (doc_id, signature.tobytes(), summary, now)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (bucket, doc_id) VALUES (?, ?)",
+                [(bucket, doc_id) for bucket in lsh_buckets(signature)]
+            )
+        return True
+
+    def find_similar(self, text: str, threshold: float, exclude: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Most similar indexed transcript that already has a summary, if it reaches threshold."""
+        signature = minhash_signature(text)
+        if signature is None:
+            return None
+        buckets = lsh_buckets(signature)
+        placeholders = ','.join('?' for _ in buckets)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT d.doc_id, d.signature, d.summary FROM documents d "
+                f"WHERE d.summary IS NOT NULL AND d.doc_id IN "
+                f"(SELECT doc_id FROM lsh_buckets WHERE bucket IN ({placeholders}))",
+                buckets
+            ).fetchall()
+
+        best = None
+        for row in rows:
+            if row['doc_id'] == exclude:
+                continue
+            similarity = estimate_similarity(signature, np.frombuffer(row['signature'], dtype=np.uint64))
+            if similarity >= threshold and (best is None or similarity > best['similarity']):
+                best = {'doc_id': row['doc_id'], 'similarity': similarity, 'summary': row['summary']}
+        return best
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    """Process-wide index shared by the cleaner tool and the web app."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DuplicateIndex()
+        return _default_index
@@ -1,13 +1,15 @@
 #FOR LATER, MORE EFFICIENT API USAGE AND RUNTIME
 
 from crewai import Agent, Crew, Process, Task
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Local tools
 from .tools.transcript_tool import EnhancedTranscriptTool
 from .tools.text_cleaner_tool import TranscriptCleanerTool
 from .tools.google_docs_tool import GoogleDocsIntegrationTool
+from .tracing import JobTrace
+from .routing import build_llm, load_model_configs
 
 load_dotenv()
 
@@ -17,6 +19,8 @@ class FastYouTubeSummarizer():
     def __init__(self):
         self._agents = None
         self._tasks = None
+        # reuse the models configured for the matching agents in agents.yaml
+        self._models = load_model_configs()
 
     def get_agents(self):
         """Return list of agents"""
@@ -28,6 +32,7 @@ class FastYouTubeSummarizer():
                     backstory="You are an expert at quickly extracting YouTube transcripts, cleaning them, and preparing them for summarization. You work fast and accurately.",
                     verbose=False,  # Reduce verbosity for speed
                     tools=[EnhancedTranscriptTool(), TranscriptCleanerTool()],
+                    llm=build_llm(self._models.get('text_cleaner')),
                     max_iter=1,  # Limit iterations for speed
                     allow_delegation=False  # No delegation to avoid overhead
                 ),
@@ -35,6 +40,7 @@ class FastYouTubeSummarizer():
                     role="AI Summary Writer",
                     goal="Create comprehensive summaries from video transcripts",
                     backstory="You excel at creating clear, well-structured summaries that capture all key points from video content. You write concise but comprehensive summaries.",
+                    llm=build_llm(self._models.get('summary_writer')),
                     verbose=False,  # Reduce verbosity for speed
                     max_iter=1,  # Limit iterations for speed
                     allow_delegation=False  # No delegation to avoid overhead
@@ -45,6 +51,7 @@ class FastYouTubeSummarizer():
                     backstory="You handle the technical details of creating formatted Google Docs from summaries.",
                     verbose=False,
                     tools=[GoogleDocsIntegrationTool()],
+                    llm=build_llm(self._models.get('docs_uploader')),
                     max_iter=1,
                     allow_delegation=False
                 )
@@ -96,9 +103,9 @@ class FastYouTubeSummarizer():
             self._tasks = [extract_task, summarize_task, gdocs_task]
         return self._tasks
 
-    def crew(self) -> Crew:
-        """Create and return the crew"""
-        return Crew(
+    def crew(self, trace: Optional[JobTrace] = None) -> Crew:
+        """Create and return the crew, recording per-task usage into trace if given"""
+        fast_crew = Crew(
             agents=self.get_agents(),
             tasks=self.get_tasks(),
             process=Process.sequential,
@@ -106,3 +113,6 @@ class FastYouTubeSummarizer():
             memory=False,   # Disable memory to reduce overhead
             max_rpm=30      # Increase requests per minute
         )
+        if trace:
+            trace.instrument(fast_crew)
+        return fast_crew
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+# checkpointed stages in pipeline order
+STAGES: List[str] = ['transcript', 'cleaned', 'summary', 'review', 'publish']
+
+# jobs in these states get picked up again after a restart
+PENDING_STATUSES = ('queued', 'running', 'stopping')
+
+# times a job is started (first run plus resumes) before it's given up on
+MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+"""
+
+
+class JobStore:
+    """Durable job records plus the output of every completed pipeline stage (SQLite)."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('JOB_STORE_PATH', 'jobs.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            # job stores created before attempts were counted
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if 'attempts' not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def _now(self) -> str:
+        return datetime.now().isoformat()
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'job_id': row['job_id'],
+            'params': json.loads(row['params']),
+            'status': row['status'],
+            'error': row['error'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+    def create_job(self, job_id: str, params: Dict[str, Any], status: str = 'queued') -> None:
+        now = self._now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, params, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(params), status, now, now)
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, self._now(), job_id)
+            )
+
+    def record_attempt(self, job_id: str) -> int:
+        """Count one more start of the job. Returns how many times it has been started."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE job_id = ? RETURNING attempts",
+                (self._now(), job_id)
+            ).fetchone()
+        return row['attempts'] if row else 0
+
+    def jobs_with_status(self, *statuses: str) -> List[Dict[str, Any]]:
+        """Jobs in any of the given states, oldest first."""
+        placeholders = ','.join('?' for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                statuses
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def pending_jobs(self) -> List[Dict[str, Any]]:
+        """Jobs that were queued or mid-run when the last process stopped, oldest first."""
+        return self.jobs_with_status(*PENDING_STATUSES)
+
+    def save_checkpoint(self, job_id: str, stage: str, output: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, stage, output, self._now())
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (self._now(), job_id))
+
+    def save_checkpoints(self, job_id: str, outputs: Dict[str, str],
+                         appends: Optional[Dict[str, str]] = None) -> None:
+        """Replace several stage outputs (and append to others) in one transaction."""
+        now = self._now()
+        with self._lock, self._conn:
+            for stage, output in (appends or {}).items():
+                self._conn.execute(
+                    "INSERT INTO checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (job_id, stage) DO UPDATE SET output = output || excluded.output",
+                    (job_id, stage, output, now)
+                )
+            for stage, output in outputs.items():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (job_id, stage, output, created_at) VALUES (?, ?, ?, ?)",
+                    (job_id, stage, output, now)
+                )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (now, job_id))
+
+    def get_checkpoint(self, job_id: str, stage: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM checkpoints WHERE job_id = ? AND stage = ?", (job_id, stage)
+            ).fetchone()
+        return row['output'] if row else None
+
+    def get_checkpoints(self, job_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, output FROM checkpoints WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {row['stage']: row['output'] for row in rows}
@@ -0,0 +1,351 @@
+"""Job runners shared by the web app's threads and the worker processes.
+
+Runners read their parameters and checkpoints from the job store and report through
+an emit(event, data) callable, so they don't care which process they run in.
+"""
+
+import os
+import time
+import logging
+from datetime import datetime
+
+from .crew import YouTubeSummarizer
+from .rolling_crew import RollingSummarizer
+from .tools.transcript_tool import EnhancedTranscriptTool
+from .job_store import JobStore, STAGES
+from .pipeline import clean_segments, iter_segment_texts, split_metadata
+from .dedup import get_duplicate_index
+from .search_index import get_search_index
+from .prefetch import prefetched_transcript
+from .tracing import JobTrace, profile_job
+
+logger = logging.getLogger(__name__)
+
+# durable job records + stage checkpoints
+job_store = JobStore()
+
+# near-duplicate transcripts: above DEDUP_THRESHOLD the stored summary only goes through review,
+# above DEDUP_REUSE_THRESHOLD it is reused as is
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.8))
+DEDUP_REUSE_THRESHOLD = float(os.getenv('DEDUP_REUSE_THRESHOLD', 0.95))
+
+# live jobs: seconds between transcript polls, and empty polls before the stream counts as ended
+LIVE_POLL_INTERVAL = int(os.getenv('LIVE_POLL_INTERVAL', 60))
+LIVE_MAX_IDLE_POLLS = int(os.getenv('LIVE_MAX_IDLE_POLLS', 10))
+# shortest poll interval a job may ask for; each poll can mean an LLM call
+LIVE_MIN_POLL_INTERVAL = int(os.getenv('LIVE_MIN_POLL_INTERVAL', 15))
+# transcript characters folded into the rolling summary per LLM call; joining a long
+# stream late makes the first poll return everything said so far
+LIVE_MAX_DELTA_CHARS = int(os.getenv('LIVE_MAX_DELTA_CHARS', 12000))
+
+# seconds a new job waits for a transcript prefetch that is still downloading
+PREFETCH_WAIT = int(os.getenv('PREFETCH_WAIT', 20))
+
+class ProgressCallback:
+    # sends progress updates to the job's room through emit(event, data)
+    def __init__(self, job_id, emit):
+        self.job_id = job_id
+        self.emit = emit
+        
+    def update_progress(self, step, message, progress_percent=None):
+        data = {
+            'job_id': self.job_id,
+            'step': step,
+            'message': message,
+            'timestamp': datetime.now().isoformat()
+        }
+        if progress_percent is not None:
+            data['progress'] = progress_percent
+            
+        self.emit('progress_update', data)
+        logger.info(f"Progress update: {step} - {message}")
+
+# progress reported as each checkpointed stage finishes
+STAGE_PROGRESS = {
+    'transcript': (35, "Transcript extracted"),
+    'cleaned': (50, "Transcript cleaned"),
+    'summary': (70, "Summary generated"),
+    'review': (85, "Summary reviewed"),
+    'publish': (95, "Publishing step finished"),
+}
+
+def run_summarization(job_id, trace, emit):
+    # run the actual summarization, resuming from any saved checkpoints
+    progress_callback = ProgressCallback(job_id, emit)
+    job = job_store.get_job(job_id)
+    params = job['params']
+    
+    try:
+        job_store.update_status(job_id, 'running')
+        progress_callback.update_progress("starting", "Starting summarization pipeline...", 5)
+        
+        # setup inputs
+        inputs = {
+            "youtube_url": params['youtube_url'],
+            "language": params.get('language'),
+            "publish_to_gdocs": params.get('publish_to_gdocs', False),
+            "gdocs_title": params.get('gdocs_title'),
+        }
+        
+        checkpoints = job_store.get_checkpoints(job_id)
+        if checkpoints:
+            done = ", ".join(stage for stage in STAGES if stage in checkpoints)
+            progress_callback.update_progress("resuming", f"Resuming after completed stages: {done}", 10)
+        
+        def on_checkpoint(stage, output):
+            job_store.save_checkpoint(job_id, stage, output)
+            checkpoints[stage] = output
+            percent, message = STAGE_PROGRESS[stage]
+            progress_callback.update_progress(stage, message, percent)
+        
+        # the page prefetched the transcript when the url was pasted: start at cleaning
+        if 'transcript' not in checkpoints:
+            with trace.span('prefetch_lookup'):
+                prefetched = prefetched_transcript(params['youtube_url'], params.get('language'), wait=PREFETCH_WAIT)
+            if prefetched:
+                job_store.save_checkpoint(job_id, 'transcript', prefetched)
+                checkpoints['transcript'] = prefetched
+                progress_callback.update_progress("transcript", "Using prefetched transcript", STAGE_PROGRESS['transcript'][0])
+        
+        # Initialize and run crew up to cleaning first
+        progress_callback.update_progress("initializing", "Initializing AI agents...", 15)
+        summarizer = YouTubeSummarizer()
+        crew = summarizer.resumable_crew(checkpoints, on_checkpoint, until='cleaned', trace=trace)
+        if crew:
+            crew.kickoff(inputs=inputs)
+        
+        # Re-uploads and mirrors: skip or shrink the LLM work using a stored summary
+        video_id = EnhancedTranscriptTool()._get_video_id(params['youtube_url'])
+        if 'cleaned' in checkpoints and 'summary' not in checkpoints:
+            with trace.span('dedup_lookup'):
+                reuse_similar_summary(job_id, video_id, checkpoints, progress_callback)
+        
+        result = None
+        crew = summarizer.resumable_crew(checkpoints, on_checkpoint, trace=trace)
+        if crew:
+            result = crew.kickoff(inputs=inputs)
+        
+        job_store.update_status(job_id, 'completed')
+        index_summary(video_id, checkpoints)
+        index_for_search(job_id, params, checkpoints)
+        
+        # Emit completion
+        progress_callback.update_progress("completed", "Summarization completed successfully", 100)
+        
+        # Send metadata only; the client fetches the texts from the REST endpoints
+        completion = completion_payload(job_id, checkpoints)
+        if result:
+            completion['result'] = str(result)[:500]
+        emit('job_completed', completion)
+        
+    except Exception as e:
+        logger.error(f"Error in summarization job {job_id}: {str(e)}")
+        job_store.update_status(job_id, 'failed', str(e))
+        emit('job_error', {
+            'job_id': job_id,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+def dedup_body(checkpoints):
+    # cleaned transcript without its header, or None when the transcript step only produced an error
+    _, cleaned_body = split_metadata(checkpoints['cleaned'])
+    if cleaned_body.lstrip().startswith('Error'):
+        return None
+    return cleaned_body
+
+def reuse_similar_summary(job_id, video_id, checkpoints, progress_callback):
+    # look the cleaned transcript up in the near-duplicate index and checkpoint a stored summary.
+    # the video's own entry is skipped: re-running a video means asking for a fresh summary
+    cleaned_body = dedup_body(checkpoints)
+    if cleaned_body is None:
+        return
+    try:
+        match = get_duplicate_index().find_similar(cleaned_body, DEDUP_THRESHOLD, exclude=video_id)
+    except Exception as e:
+        logger.warning(f"Duplicate lookup failed for job {job_id}: {e}")
+        return
+    if not match:
+        return
+    
+    similarity = f"{match['similarity']:.0%}"
+    if match['similarity'] >= DEDUP_REUSE_THRESHOLD:
+        reused = {'summary': match['summary'], 'review': match['summary']}
+        message = f"Near-duplicate of {match['doc_id']} ({similarity} similar), reusing its summary"
+    else:
+        # only the cheaper review pass runs, checking the stored summary against this transcript
+        reused = {'summary': match['summary']}
+        message = f"Similar to {match['doc_id']} ({similarity}), reviewing its summary instead of writing a new one"
+    
+    job_store.save_checkpoints(job_id, reused)
+    checkpoints.update(reused)
+    progress_callback.update_progress("deduplicated", message, 70)
+
+def index_summary(video_id, checkpoints):
+    # remember this video's summary so later near-duplicates can reuse it
+    summary = summary_text(checkpoints)
+    if not video_id or 'cleaned' not in checkpoints or not summary:
+        return
+    cleaned_body = dedup_body(checkpoints)
+    if cleaned_body is None:
+        return
+    try:
+        get_duplicate_index().add(video_id, cleaned_body, summary)
+    except Exception as e:
+        logger.warning(f"Could not index summary of {video_id}: {e}")
+
+def index_for_search(job_id, params, checkpoints):
+    # make the finished job findable through /search; live transcripts have no header, so pass the url
+    if not checkpoints.get('transcript'):
+        return
+    try:
+        get_search_index().add(
+            checkpoints['transcript'],
+            summary_text(checkpoints),
+            job_id=job_id,
+            source='job',
+            metadata={'URL': params.get('youtube_url')}
+        )
+    except Exception as e:
+        logger.warning(f"Could not add job {job_id} to the search index: {e}")
+
+def wait_unless_stopped(job_id, seconds):
+    # sleep between live polls, returning early (True) once a stop was requested
+    deadline = time.monotonic() + seconds
+    while True:
+        if job_store.get_job(job_id)['status'] == 'stopping':
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(remaining, 2))
+
+def delta_chunks(segments, max_chars=LIVE_MAX_DELTA_CHARS):
+    # consecutive runs of segments of at most max_chars text each (a longer segment goes alone)
+    chunk = []
+    size = 0
+    for segment in segments:
+        if chunk and size + len(segment.text) > max_chars:
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append(segment)
+        size += len(segment.text)
+    if chunk:
+        yield chunk
+
+def run_live_summarization(job_id, trace, emit):
+    # rolling summary of a live stream/premiere: each poll only summarizes segments past the watermark
+    progress_callback = ProgressCallback(job_id, emit)
+    job = job_store.get_job(job_id)
+    params = job['params']
+    # /process validates this; the clamp covers jobs stored before it did
+    poll_interval = max(float(params.get('poll_interval') or LIVE_POLL_INTERVAL), LIVE_MIN_POLL_INTERVAL)
+    
+    try:
+        if job['status'] != 'stopping':
+            job_store.update_status(job_id, 'running')
+        
+        checkpoints = job_store.get_checkpoints(job_id)
+        rolling_summary = checkpoints.get('summary', '')
+        watermark = float(checkpoints.get('watermark', -1))
+        
+        tool = EnhancedTranscriptTool()
+        summarizer = RollingSummarizer()
+        idle_polls = 0
+        updates = 0
+        progress_callback.update_progress("live", "Watching for new transcript segments...")
+        
+        stopped = job['status'] == 'stopping'
+        while not stopped and idle_polls < LIVE_MAX_IDLE_POLLS:
+            with trace.span('live_poll'):
+                segments, _ = tool.fetch_segments_since(
+                    params['youtube_url'], watermark, params.get('language')
+                )
+            if segments:
+                idle_polls = 0
+                for chunk in delta_chunks(segments):
+                    delta = "".join(clean_segments(iter_segment_texts(chunk)))
+                    rolling_summary = summarizer.update(rolling_summary, delta, trace=trace)
+                    watermark = max(segment.start for segment in chunk)
+                    updates += 1
+                    
+                    # summary and watermark move together so a restart never folds a delta twice
+                    job_store.save_checkpoints(
+                        job_id,
+                        {'summary': rolling_summary, 'watermark': str(watermark)},
+                        appends={'transcript': "\n".join(iter_segment_texts(chunk)) + "\n"}
+                    )
+                    emit('summary_update', {
+                        'job_id': job_id,
+                        'summary': rolling_summary,
+                        'watermark': watermark,
+                        'new_segments': len(chunk),
+                        'update': updates,
+                        'links': job_links(job_id),
+                        'timestamp': datetime.now().isoformat()
+                    })
+                progress_callback.update_progress("live", f"Summary updated with {len(segments)} new segments")
+            else:
+                idle_polls += 1
+            
+            stopped = wait_unless_stopped(job_id, poll_interval)
+        
+        job_store.update_status(job_id, 'completed')
+        checkpoints = job_store.get_checkpoints(job_id)
+        index_for_search(job_id, params, checkpoints)
+        reason = "Stopped by user" if stopped else "No new transcript segments, stream looks finished"
+        progress_callback.update_progress("completed", reason, 100)
+        emit('job_completed', completion_payload(job_id, checkpoints))
+        
+    except Exception as e:
+        logger.error(f"Error in live summarization job {job_id}: {str(e)}")
+        job_store.update_status(job_id, 'failed', str(e))
+        emit('job_error', {
+            'job_id': job_id,
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        })
+
+def job_links(job_id):
+    return {
+        'job': f"/jobs/{job_id}",
+        'summary': f"/jobs/{job_id}/summary",
+        'transcript': f"/jobs/{job_id}/transcript",
+        'trace': f"/jobs/{job_id}/trace",
+    }
+
+def summary_text(checkpoints):
+    # the reviewed summary is the final one; fall back to the draft
+    return checkpoints.get('review') or checkpoints.get('summary')
+
+def completion_payload(job_id, checkpoints):
+    summary = summary_text(checkpoints)
+    transcript = checkpoints.get('transcript')
+    return {
+        'job_id': job_id,
+        'success': True,
+        'links': job_links(job_id),
+        'sizes': {
+            'summary': len(summary.encode('utf-8')) if summary else 0,
+            'transcript': len(transcript.encode('utf-8')) if transcript else 0,
+        },
+        'result': checkpoints.get('publish', "Completed successfully")[:500],
+    }
+
+def run_job(job_id, emit):
+    # run a stored job in this process; every job gets a JSONL trace, and a profiler when requested
+    job = job_store.get_job(job_id)
+    params = job['params']
+    runner = run_live_summarization if params.get('live') else run_summarization
+    trace = JobTrace(job_id)
+    trace.record('job_started', live=bool(params.get('live')), resumed=job['status'] != 'queued',
+                 profile=params.get('profile'))
+    started = time.monotonic()
+    
+    with trace.activate(), profile_job(job_id, params.get('profile'), trace):
+        runner(job_id, trace, emit)
+    
+    finished = job_store.get_job(job_id)
+    trace.record('job_finished', status=finished['status'], error=finished['error'],
+                 latency_ms=round((time.monotonic() - started) * 1000, 1))
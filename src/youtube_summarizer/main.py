@@ -11,16 +11,38 @@ _current_dir = os.path.dirname(os.path.abspath(_current_file))
 _parent_dir = os.path.dirname(_current_dir)
 sys.path.insert(0, _parent_dir)
 
-from crew import YouTubeSummarizer
+from youtube_summarizer.search_index import SearchIndex, import_output_files, import_completed_jobs
 
 load_dotenv()
 
 
+def search(index, query, limit):
+    results = index.search(query, limit)
+    if not results:
+        print(f"No matches for '{query}'")
+        return
+    for rank, result in enumerate(results, 1):
+        title = result['title'] or result['doc_id']
+        channel = f" - {result['channel']}" if result['channel'] else ""
+        print(f"{rank}. {title}{channel}  (score {result['score']:.4g})")
+        print(f"   {result['url'] or result['source'] or ''}")
+        print(f"   {' '.join(result['snippet'].split())}")
+
+
+def import_outputs(index, paths):
+    from youtube_summarizer.job_store import JobStore
+
+    files = import_output_files(index, paths)
+    jobs = import_completed_jobs(index, JobStore())
+    index.optimize()
+    print(f"Indexed {files} output file(s) and {jobs} completed job(s); {index.count()} videos searchable")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Summarize a YouTube video and optionally publish to Google Docs"
     )
-    parser.add_argument("--url", required=True, help="YouTube video URL")
+    parser.add_argument("--url", default=None, help="YouTube video URL")
     parser.add_argument(
         "--lang",
         default=None,
@@ -36,9 +58,42 @@ def main():
         default=None,
         help="Optional Google Docs title to use when publishing",
     )
+    parser.add_argument(
+        "--search",
+        default=None,
+        metavar="QUERY",
+        help="Search indexed transcripts and summaries instead of summarizing",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Number of search results to show",
+    )
+    parser.add_argument(
+        "--import-outputs",
+        nargs="*",
+        default=None,
+        metavar="PATH",
+        help="Index existing transcript.md/SUMMARY.md files under these paths (default: current "
+             "directory) plus completed jobs from the job store",
+    )
 
     args = parser.parse_args()
 
+    if args.search is not None or args.import_outputs is not None:
+        index = SearchIndex()
+        if args.import_outputs is not None:
+            import_outputs(index, args.import_outputs or ["."])
+        if args.search is not None:
+            search(index, args.search, args.limit)
+        return
+
+    if not args.url:
+        parser.error("--url is required unless --search or --import-outputs is given")
+
+    from youtube_summarizer.crew import YouTubeSummarizer
+
     inputs = {
         "youtube_url": args.url,
         "language": args.lang,
@@ -49,6 +104,7 @@ def main():
     print("Starting summarization pipeline...")
     crew = YouTubeSummarizer().crew()
     crew.kickoff(inputs=inputs)
+    import_output_files(SearchIndex(), ["transcript.md"])
 
     print("Done. Outputs:")
     print("- transcript.md (raw transcript)")
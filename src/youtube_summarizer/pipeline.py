@@ -0,0 +1,93 @@
+"""Generator-based transcript pipeline: segments in, cleaned text out.
+
+Nothing here holds more than one segment at a time, so memory stays flat no matter
+how long the transcript is. Kept free of crewai imports so it can run standalone.
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, Tuple
+
+# Patterns like 00:00, 0:00:00, [00:00], (00:00) - applied in this order
+TIMESTAMP_PATTERNS = [
+    re.compile(r"\b\d{1,2}:\d{2}(?::\d{2})?\b"),   # 0:00 or 00:00:00
+    re.compile(r"\[\d{1,2}:\d{2}(?::\d{2})?\]"),  # [00:00]
+    re.compile(r"\(\d{1,2}:\d{2}(?::\d{2})?\)"),  # (00:00)
+]
+
+# Basic filler words, non-destructive (word-boundary to avoid partial matches)
+FILLER_PATTERNS = [
+    re.compile(p, flags=re.IGNORECASE) for p in (
+        r"\bum\b", r"\buh\b", r"\blike\b", r"\byou know\b", r"\bsort of\b",
+        r"\bkinda\b", r"\ber\b", r"\bem\b"
+    )
+]
+
+
+def split_metadata(text: str) -> Tuple[str, str]:
+    """If there's a metadata header separated by a '---' line, split it out."""
+    parts = text.split("\n---\n", 1)
+    if len(parts) == 2:
+        return parts[0].rstrip() + "\n\n---\n\n", parts[1]
+    return "", text
+
+
+def parse_metadata_header(text: str) -> Dict[str, str]:
+    """Read the 'Key: value' lines of the metadata header above the '---' line, if any."""
+    fields: Dict[str, str] = {}
+    end = text.find("\n---\n")
+    if end == -1:
+        return fields
+    for line in iter_lines(text[:end]):
+        key, sep, value = line.partition(":")
+        if sep and not key.startswith("#"):
+            fields[key.strip()] = value.strip()
+    return fields
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield the lines of text without building a list of them."""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_segment_texts(fetched) -> Iterator[str]:
+    """Yield the text of each fetched transcript segment."""
+    for segment in fetched:
+        yield segment.text
+
+
+def clean_line(line: str) -> str:
+    """Remove timestamps and filler words from one line."""
+    for pattern in TIMESTAMP_PATTERNS:
+        line = pattern.sub("", line)
+    for pattern in FILLER_PATTERNS:
+        line = pattern.sub("", line)
+    return line
+
+
+def clean_segments(lines: Iterable[str]) -> Iterator[str]:
+    """Clean transcript lines one at a time.
+
+    Whitespace is collapsed and sentences end with a line break, so the joined
+    output matches cleaning the whole text at once.
+    """
+    pending_sep = None
+    for line in lines:
+        tokens = clean_line(line).split()
+        if not tokens:
+            continue
+        parts = []
+        for token in tokens:
+            if pending_sep is not None:
+                parts.append(pending_sep)
+            parts.append(token)
+            pending_sep = "\n" if token.endswith(".") else " "
+        yield "".join(parts)
+    yield "\n"
+
@@ -0,0 +1,191 @@
+"""Speculative transcript prefetch for the web UI.
+
+When a URL is pasted the page asks for its languages, and the transcript is fetched in
+the background into a short-lived SQLite cache. A job started for the same video and
+language then checkpoints the cached transcript and starts at cleaning. The cache is
+SQLite rather than in-memory so jobs running in worker processes see it too.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Optional, Dict, Any, List, Tuple
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from .tools.transcript_tool import EnhancedTranscriptTool
+
+logger = logging.getLogger(__name__)
+
+# seconds a prefetched transcript stays usable
+PREFETCH_TTL = int(os.getenv('PREFETCH_TTL', 600))
+# a fetch that hasn't finished after this many seconds is treated as dead
+PREFETCH_FETCH_TIMEOUT = 60
+# how often a waiting job checks on an in-flight fetch
+POLL_INTERVAL = 0.25
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    transcript TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (video_id, language)
+);
+"""
+
+
+class TranscriptCache:
+    """Prefetched transcripts keyed by (video_id, requested language), expiring after a TTL.
+
+    A row without a transcript marks a fetch in flight, so a second prefetch or a job
+    started meanwhile (in any process) waits for it instead of fetching again.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = PREFETCH_TTL):
+        self.path = path or os.getenv('PREFETCH_CACHE_PATH', 'prefetch.db')
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def _purge(self, now: float) -> None:
+        # caller holds the lock and a transaction
+        self._conn.execute(
+            "DELETE FROM transcripts WHERE created_at < ? OR (transcript IS NULL AND created_at < ?)",
+            (now - self.ttl, now - PREFETCH_FETCH_TIMEOUT)
+        )
+
+    def claim(self, video_id: str, language: Optional[str]) -> bool:
+        """Mark a fetch as in flight. False if the transcript is cached or already being fetched."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._purge(now)
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO transcripts (video_id, language, transcript, created_at) VALUES (?, ?, NULL, ?)",
+                (video_id, language or '', now)
+            )
+        return cursor.rowcount == 1
+
+    def put(self, video_id: str, language: Optional[str], transcript: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, language, transcript, created_at) VALUES (?, ?, ?, ?)",
+                (video_id, language or '', transcript, time.time())
+            )
+
+    def release(self, video_id: str, language: Optional[str]) -> None:
+        """Drop an in-flight marker after a failed fetch."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM transcripts WHERE video_id = ? AND language = ? AND transcript IS NULL",
+                (video_id, language or '')
+            )
+
+    def get(self, video_id: str, language: Optional[str], wait: float = 0) -> Optional[str]:
+        """Cached transcript, waiting up to `wait` seconds if a fetch for it is in flight."""
+        deadline = time.monotonic() + wait
+        while True:
+            now = time.time()
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT transcript, created_at FROM transcripts WHERE video_id = ? AND language = ?",
+                    (video_id, language or '')
+                ).fetchone()
+            if row is None:
+                return None
+            if row['transcript'] is not None:
+                return row['transcript'] if row['created_at'] >= now - self.ttl else None
+            if row['created_at'] < now - PREFETCH_FETCH_TIMEOUT or time.monotonic() >= deadline:
+                return None
+            time.sleep(POLL_INTERVAL)
+
+
+def language_options(available_languages: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """The video's transcript languages for the language picker, and what youtube can translate to."""
+    options = []
+    translation_targets: Dict[str, str] = {}
+    for code, info in available_languages.items():
+        options.append({
+            'code': code,
+            'name': info['language'],
+            'is_generated': info['is_generated'],
+        })
+        if info.get('is_translatable'):
+            translation_targets.update(info.get('translation_languages', {}))
+    return options, [
+        {'code': code, 'name': name}
+        for code, name in sorted(translation_targets.items(), key=lambda item: item[1])
+        if code not in available_languages
+    ]
+
+
+def _warm(cache: TranscriptCache, url: str, video_id: str, language: Optional[str],
+          transcript_list=None) -> None:
+    try:
+        header, segments = EnhancedTranscriptTool()._open_transcript(url, language, transcript_list)
+        transcript = header + "\n".join(segments)
+    except Exception as e:
+        logger.warning(f"Prefetch of {video_id} failed: {e}")
+        cache.release(video_id, language)
+        return
+    cache.put(video_id, language, transcript)
+    logger.info(f"Prefetched transcript of {video_id} ({len(transcript)} chars)")
+
+
+def prefetch(url: str, language: Optional[str] = None, list_languages: bool = True) -> Dict[str, Any]:
+    """Validate url, list its languages and start warming its transcript in the background.
+
+    Raises ValueError for URLs that aren't YouTube videos.
+    """
+    tool = EnhancedTranscriptTool()
+    video_id = tool._get_video_id(url)
+    if not video_id:
+        raise ValueError("Invalid YouTube URL format.")
+
+    # one listing serves both the language picker and the background fetch
+    transcript_list = None
+    if list_languages:
+        try:
+            transcript_list = YouTubeTranscriptApi().list(video_id)
+        except Exception as e:
+            logger.warning(f"Could not list transcripts of {video_id}: {e}")
+
+    cache = get_transcript_cache()
+    warming = cache.claim(video_id, language)
+    if warming:
+        thread = threading.Thread(target=_warm, args=(cache, url, video_id, language, transcript_list))
+        thread.daemon = True
+        thread.start()
+
+    result: Dict[str, Any] = {'video_id': video_id, 'language': language, 'warming': warming}
+    if list_languages:
+        available_languages = tool._get_available_languages(video_id, transcript_list) if transcript_list else {}
+        result['languages'], result['translations'] = language_options(available_languages)
+    return result
+
+
+def prefetched_transcript(url: str, language: Optional[str] = None, wait: float = 0) -> Optional[str]:
+    """Transcript warmed by prefetch() for this url and language, if any."""
+    video_id = EnhancedTranscriptTool()._get_video_id(url)
+    if not video_id:
+        return None
+    return get_transcript_cache().get(video_id, language, wait)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """Process-wide cache shared by the prefetch endpoint and the job runners."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptCache()
+        return _default_cache
@@ -0,0 +1,71 @@
+from crewai import Agent, Crew, Process, Task
+from typing import Optional
+from dotenv import load_dotenv
+
+from .tracing import JobTrace
+from .routing import build_llm, load_model_configs
+
+load_dotenv()
+
+class RollingSummarizer():
+    """Incremental pipeline: fold newly arrived transcript text into an existing summary.
+
+    Each update only sends the new transcript delta plus the current summary to the LLM,
+    so its cost tracks the new content rather than the whole stream.
+    """
+
+    # keep the rolling summary bounded so updates stay cheap as the stream grows
+    MAX_SUMMARY_WORDS = 600
+
+    def get_agent(self) -> Agent:
+        return Agent(
+            role="Live Summary Editor",
+            goal="Keep a running summary of a live video up to date as new transcript text arrives",
+            backstory="You maintain summaries of live streams. You merge new material into the existing summary, keep what still matters, and never repeat points that are already covered.",
+            llm=build_llm(load_model_configs().get('summary_writer')),
+            verbose=False,
+            max_iter=1,
+            allow_delegation=False
+        )
+
+    def get_task(self, agent: Agent) -> Task:
+        return Task(
+            description="""
+            Update the running summary of a live video with newly transcribed content.
+
+            Current summary (empty at the start of the stream):
+            {rolling_summary}
+
+            New transcript text since the last update:
+            {new_transcript}
+
+            - Fold the new points into the existing headings, or add a heading for a new topic
+            - Do not drop earlier key points; condense them if space is needed
+            - Stay under {max_words} words, in markdown with headings and bullet points
+            - Output only the updated summary
+            """,
+            expected_output="The full updated markdown summary",
+            agent=agent
+        )
+
+    def crew(self, trace: Optional[JobTrace] = None) -> Crew:
+        agent = self.get_agent()
+        rolling_crew = Crew(
+            agents=[agent],
+            tasks=[self.get_task(agent)],
+            process=Process.sequential,
+            verbose=False,
+            memory=False
+        )
+        if trace:
+            trace.instrument(rolling_crew)
+        return rolling_crew
+
+    def update(self, rolling_summary: str, new_transcript: str, trace: Optional[JobTrace] = None) -> str:
+        """Return rolling_summary with new_transcript folded in."""
+        result = self.crew(trace).kickoff(inputs={
+            "rolling_summary": rolling_summary or "(none yet)",
+            "new_transcript": new_transcript,
+            "max_words": self.MAX_SUMMARY_WORDS,
+        })
+        return result.raw
@@ -0,0 +1,212 @@
+"""Per-agent model selection with latency/error-aware fallback.
+
+Agents declare a `model` block in config/agents.yaml:
+
+    text_cleaner:
+      model:
+        name: gpt-4o-mini          # primary model (any litellm model string), default OPENAI_MODEL_NAME
+        temperature: 0             # any other key is passed to crewai's LLM
+        fallbacks: [gpt-4.1-nano]  # strings or blocks like the primary
+        max_latency_ms: 8000       # SLO: rolling p95 latency above this skips the model
+        max_error_rate: 0.25       # SLO: rolling error rate above this skips the model
+
+Stats are kept per model for the whole process, so one slow agent shifts every agent
+that shares the model. Old samples age out, which lets a skipped model back in.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List
+
+import yaml
+from crewai import LLM
+from crewai.utilities.exceptions.context_window_exceeding_exception import LLMContextLengthExceededException
+
+from .tracing import current_trace
+
+AGENTS_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config', 'agents.yaml')
+
+# rolling window per model: at most this many samples, none older than STATS_WINDOW_SECONDS
+STATS_WINDOW_SIZE = 50
+STATS_WINDOW_SECONDS = 300
+# don't judge a model on fewer samples than this
+MIN_SAMPLES = 5
+
+SLO_KEYS = ('fallbacks', 'max_latency_ms', 'max_error_rate')
+
+# primary model for blocks without a name when OPENAI_MODEL_NAME isn't set (crewai's default too)
+DEFAULT_MODEL = 'gpt-4o-mini'
+
+# timeouts, conflicts and rate limits are worth trying on another model; so is any 5xx
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    max_latency_ms: Optional[float] = None
+    max_error_rate: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config, defaults: Optional["ModelSpec"] = None) -> "ModelSpec":
+        """Build from a model name or a config block; SLOs default to the primary's.
+
+        A block without a name uses OPENAI_MODEL_NAME, like agents without a model block.
+        """
+        if isinstance(config, str):
+            config = {'name': config}
+        params = {k: v for k, v in config.items() if k != 'name' and k not in SLO_KEYS}
+        return cls(
+            name=config.get('name') or os.getenv('OPENAI_MODEL_NAME') or DEFAULT_MODEL,
+            params=params,
+            max_latency_ms=config.get('max_latency_ms', defaults.max_latency_ms if defaults else None),
+            max_error_rate=config.get('max_error_rate', defaults.max_error_rate if defaults else None),
+        )
+
+
+class ModelRouter:
+    """Rolling per-model latency and error rates, and the call order they imply."""
+
+    def __init__(self, window_size: int = STATS_WINDOW_SIZE, window_seconds: float = STATS_WINDOW_SECONDS):
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window_size))
+            samples.append((time.monotonic(), latency_ms, ok))
+
+    def stats(self, model: str) -> Dict[str, Any]:
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            samples = self._samples.get(model, deque())
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            recent = list(samples)
+
+        if not recent:
+            return {'calls': 0, 'p50_ms': None, 'p95_ms': None, 'error_rate': 0.0}
+        latencies = sorted(latency for _, latency, _ in recent)
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            'calls': len(recent),
+            'p50_ms': latencies[len(latencies) // 2],
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'error_rate': errors / len(recent),
+        }
+
+    def is_healthy(self, spec: ModelSpec) -> bool:
+        stats = self.stats(spec.name)
+        if stats['calls'] < MIN_SAMPLES:
+            return True
+        if spec.max_latency_ms is not None and stats['p95_ms'] > spec.max_latency_ms:
+            return False
+        if spec.max_error_rate is not None and stats['error_rate'] > spec.max_error_rate:
+            return False
+        return True
+
+    def order(self, candidates: List[ModelSpec]) -> List[ModelSpec]:
+        """Healthy models in configured order, then the rest as a last resort."""
+        healthy = [spec for spec in candidates if self.is_healthy(spec)]
+        return healthy + [spec for spec in candidates if spec not in healthy]
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = list(self._samples)
+        return {model: self.stats(model) for model in models}
+
+
+# shared by every routed agent in this process
+default_router = ModelRouter()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether another model could succeed where this call failed.
+
+    Only timeouts, rate limits, connection problems and server errors qualify. Context
+    length, auth and bad-request errors would fail the same way on every model (and
+    crewai handles context length itself), so they aren't the model's fault.
+    """
+    if isinstance(error, LLMContextLengthExceededException):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # litellm/openai errors carry the HTTP status
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if not isinstance(status, int):
+        return False
+    return status in RETRYABLE_STATUS_CODES or status >= 500
+
+
+class RoutedLLM(LLM):
+    """crewai LLM that sends each call to the first healthy model of a primary + fallbacks chain.
+
+    Calls that fail for retryable reasons (see is_retryable) fall through to the next
+    model and count against the model's stats; any other error is re-raised as is.
+    """
+
+    def __init__(self, candidates: List[ModelSpec], router: Optional[ModelRouter] = None):
+        primary = candidates[0]
+        super().__init__(model=primary.name, **primary.params)
+        self.candidates = candidates
+        self.router = router or default_router
+        self._delegates = {spec.name: LLM(model=spec.name, **spec.params) for spec in candidates}
+
+    def call(self, messages, *args, **kwargs):
+        last_error = None
+        for spec in self.router.order(self.candidates):
+            delegate = self._delegates[spec.name]
+            # agents set stop words on the LLM they hold, i.e. on this wrapper
+            delegate.stop = self.stop
+            started = time.monotonic()
+            try:
+                result = delegate.call(messages, *args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    self._record(spec, started, ok=False, error=str(e), count=False)
+                    raise
+                last_error = e
+                self._record(spec, started, ok=False, error=str(e))
+                continue
+            self._record(spec, started, ok=True)
+            return result
+        raise last_error
+
+    def _record(self, spec: ModelSpec, started: float, ok: bool, error: Optional[str] = None,
+                count: bool = True) -> None:
+        # count=False keeps errors that aren't the model's fault out of its SLO stats
+        latency_ms = round((time.monotonic() - started) * 1000, 1)
+        if count:
+            self.router.record(spec.name, latency_ms, ok)
+        trace = current_trace()
+        if trace:
+            trace.record('llm_call', model=spec.name, primary=spec.name == self.candidates[0].name,
+                         latency_ms=latency_ms, ok=ok, error=error, counted=count)
+
+
+def build_llm(model_config: Optional[Dict[str, Any]], router: Optional[ModelRouter] = None) -> Optional[RoutedLLM]:
+    """RoutedLLM for an agent's `model` block, or None to keep crewai's default model."""
+    if not model_config:
+        return None
+    candidates = [ModelSpec.from_config(model_config)]
+    for fallback in model_config.get('fallbacks', []):
+        spec = ModelSpec.from_config(fallback, candidates[0])
+        # a fallback can coincide with the primary picked by OPENAI_MODEL_NAME
+        if all(spec.name != candidate.name for candidate in candidates):
+            candidates.append(spec)
+    return RoutedLLM(candidates, router)
+
+
+def load_model_configs(path: str = AGENTS_CONFIG_PATH) -> Dict[str, Dict[str, Any]]:
+    """The `model` block of every agent in an agents.yaml, keyed by agent name."""
+    with open(path, 'r', encoding='utf-8') as f:
+        agents = yaml.safe_load(f) or {}
+    return {name: config['model'] for name, config in agents.items() if config.get('model')}
@@ -0,0 +1,214 @@
+"""Full-text search over processed videos: metadata header fields, transcripts and summaries.
+
+Backed by an SQLite FTS5 table, so a query is an inverted-index lookup ranked with
+bm25 (title and channel weigh more than the transcript body) and returns a snippet
+around the best match. Each video is one document keyed by its video id, so
+re-running a video replaces its entry instead of adding another.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable
+
+from .pipeline import parse_metadata_header, split_metadata
+
+# bm25 weights per column of search_fts, in column order
+COLUMN_WEIGHTS = {'title': 10.0, 'channel': 5.0, 'metadata': 2.0, 'summary': 3.0, 'transcript': 1.0}
+
+# header fields that get their own column; the rest go into `metadata`
+TITLE_FIELD = 'Title'
+CHANNEL_FIELD = 'Channel'
+
+SNIPPET_TOKENS = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    job_id TEXT,
+    source TEXT,
+    metadata TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    title, channel, metadata, summary, transcript,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, a trailing * keeps prefix search.
+
+    Words are quoted, so input like `c++ "foo` can't trip FTS5's query syntax.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if not word:
+            continue
+        terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+
+class SearchIndex:
+    """Persistent FTS5 index of every processed video."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('SEARCH_INDEX_PATH', 'search.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def add(self, transcript: str, summary: Optional[str] = None, doc_id: Optional[str] = None,
+            job_id: Optional[str] = None, source: Optional[str] = None,
+            metadata: Optional[Dict[str, str]] = None) -> str:
+        """Index (or re-index) a transcript with its metadata header, plus its summary if known.
+
+        The header is parsed from the transcript; `metadata` fills in fields it lacks. The
+        document id is the video id, else doc_id, else job_id. An existing summary is kept
+        unless a new one is given. Returns the document id.
+        """
+        fields = {key: value for key, value in (metadata or {}).items() if value}
+        fields.update(parse_metadata_header(transcript))
+        _, body = split_metadata(transcript)
+        doc_id = fields.get('Video ID') or doc_id or job_id
+        if not doc_id:
+            raise ValueError("Document needs a video id, doc_id or job_id")
+
+        other_fields = "\n".join(f"{key}: {value}" for key, value in fields.items()
+                                 if key not in (TITLE_FIELD, CHANNEL_FIELD))
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT d.id, f.summary FROM documents d JOIN search_fts f ON f.rowid = d.id WHERE d.doc_id = ?",
+                (doc_id,)
+            ).fetchone()
+            if summary is None and existing:
+                summary = existing['summary']
+            if existing:
+                self._conn.execute("DELETE FROM search_fts WHERE rowid = ?", (existing['id'],))
+            row_id = self._conn.execute(
+                "INSERT INTO documents (doc_id, job_id, source, metadata, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (doc_id) DO UPDATE SET job_id = COALESCE(excluded.job_id, documents.job_id), "
+                "source = COALESCE(excluded.source, documents.source), metadata = excluded.metadata, "
+                "updated_at = excluded.updated_at RETURNING id",
+                (doc_id, job_id, source, json.dumps(fields), now)
+            ).fetchone()['id']
+            self._conn.execute(
+                "INSERT INTO search_fts (rowid, title, channel, metadata, summary, transcript) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (row_id, fields.get(TITLE_FIELD, ''), fields.get(CHANNEL_FIELD, ''), other_fields,
+                 summary or '', body)
+            )
+        return doc_id
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Best matches first, each with a snippet of the column that matched best."""
+        expression = match_query(query)
+        if not expression:
+            return []
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS.values())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT d.doc_id, d.job_id, d.source, d.metadata, d.updated_at, "
+                f"bm25(search_fts, {weights}) AS score, "
+                f"snippet(search_fts, -1, '[', ']', '...', {SNIPPET_TOKENS}) AS snippet "
+                f"FROM search_fts JOIN documents d ON d.id = search_fts.rowid "
+                f"WHERE search_fts MATCH ? ORDER BY score LIMIT ?",
+                (expression, limit)
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            fields = json.loads(row['metadata'])
+            results.append({
+                'doc_id': row['doc_id'],
+                'job_id': row['job_id'],
+                'title': fields.get(TITLE_FIELD),
+                'channel': fields.get(CHANNEL_FIELD),
+                'url': fields.get('URL'),
+                'source': row['source'],
+                'metadata': fields,
+                # bm25 is lower-is-better; flip it so higher means more relevant
+                'score': round(-row['score'], 4),
+                'snippet': row['snippet'],
+                'updated_at': row['updated_at'],
+            })
+        return results
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def optimize(self) -> None:
+        """Merge the FTS index segments; worth it after a bulk import."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO search_fts (search_fts) VALUES ('optimize')")
+
+
+def find_output_pairs(paths: Iterable[str]) -> Iterable[tuple]:
+    """(transcript.md, SUMMARY.md or None) for every transcript.md under the given files/directories."""
+    for path in paths:
+        if os.path.isfile(path):
+            summary_path = os.path.join(os.path.dirname(path), 'SUMMARY.md')
+            yield path, summary_path if os.path.isfile(summary_path) else None
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('__pycache__', 'node_modules')]
+            if 'transcript.md' in files:
+                summary_path = os.path.join(root, 'SUMMARY.md')
+                yield os.path.join(root, 'transcript.md'), summary_path if 'SUMMARY.md' in files else None
+
+
+def import_output_files(index: SearchIndex, paths: Iterable[str]) -> int:
+    """Index existing transcript.md/SUMMARY.md outputs. Returns how many were indexed."""
+    imported = 0
+    for transcript_path, summary_path in find_output_pairs(paths):
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            transcript = f.read()
+        summary = None
+        if summary_path:
+            with open(summary_path, 'r', encoding='utf-8') as f:
+                summary = f.read()
+        index.add(transcript, summary, doc_id=os.path.abspath(transcript_path), source=transcript_path)
+        imported += 1
+    return imported
+
+
+def import_completed_jobs(index: SearchIndex, job_store) -> int:
+    """Index every completed job in the job store. Returns how many were indexed."""
+    imported = 0
+    for job in job_store.jobs_with_status('completed'):
+        checkpoints = job_store.get_checkpoints(job['job_id'])
+        if not checkpoints.get('transcript'):
+            continue
+        index.add(
+            checkpoints['transcript'],
+            checkpoints.get('review') or checkpoints.get('summary'),
+            job_id=job['job_id'],
+            source='job',
+            metadata={'URL': job['params'].get('youtube_url')},
+        )
+        imported += 1
+    return imported
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Process-wide index shared by the job runners and the web app."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SearchIndex()
+        return _default_index
@@ -4,6 +4,8 @@ import json
 import os
 from pathlib import Path
 
+from ..tracing import tool_span
+
 try:
     from googleapiclient.discovery import build
     from google.oauth2.credentials import Credentials
@@ -135,6 +137,10 @@ class GoogleDocsIntegrationTool(BaseTool):
     def _run(self, summary_content: str, doc_title: str = "YouTube Video Summary", 
              folder_id: Optional[str] = None) -> str:
         """Create a Google Doc with the summary content."""
+        with tool_span(self.name, input_chars=len(summary_content)):
+            return self._create_document(summary_content, doc_title, folder_id)
+
+    def _create_document(self, summary_content: str, doc_title: str, folder_id: Optional[str]) -> str:
         try:
             creds = self._authenticate()
             if not creds:
@@ -1,6 +1,12 @@
 from crewai.tools import BaseTool
-import re
 from typing import Optional
+import logging
+
+from ..pipeline import clean_segments, iter_lines, parse_metadata_header, split_metadata
+from ..dedup import get_duplicate_index
+from ..tracing import tool_span
+
+logger = logging.getLogger(__name__)
 
 class TranscriptCleanerTool(BaseTool):
     name: str = "Transcript Cleaner"
@@ -8,45 +14,23 @@ class TranscriptCleanerTool(BaseTool):
 
     def _split_metadata(self, text: str) -> tuple[str, str]:
         """If there's a metadata header separated by a '---' line, split it out."""
-        parts = text.split("\n---\n", 1)
-        if len(parts) == 2:
-            return parts[0].rstrip() + "\n\n---\n\n", parts[1]
-        return "", text
-
-    def _remove_timestamps(self, text: str) -> str:
-        # Patterns like 00:00, 0:00:00, [00:00], (00:00)
-        patterns = [
-            r"\b\d{1,2}:\d{2}(?::\d{2})?\b",   # 0:00 or 00:00:00
-            r"\[\d{1,2}:\d{2}(?::\d{2})?\]",  # [00:00]
-            r"\(\d{1,2}:\d{2}(?::\d{2})?\)",  # (00:00)
-        ]
-        for p in patterns:
-            text = re.sub(p, "", text)
-        return text
-
-    def _remove_fillers(self, text: str) -> str:
-        # Basic filler words, non-destructive (word-boundary to avoid partial matches)
-        fillers = [
-            r"\bum\b", r"\buh\b", r"\blike\b", r"\byou know\b", r"\bsort of\b",
-            r"\bkinda\b", r"\ber\b", r"\bem\b"
-        ]
-        for f in fillers:
-            text = re.sub(f, "", text, flags=re.IGNORECASE)
-        return text
-
-    def _normalize_whitespace(self, text: str) -> str:
-        # Remove duplicate spaces and excessive newlines
-        text = re.sub(r"\s+", " ", text)
-        text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
-        # Restore line breaks at sentence boundaries heuristically (keep simple)
-        text = re.sub(r"\.\s+", ".\n", text)
-        return text.strip() + "\n"
+        return split_metadata(text)
 
     def _run(self, transcript_text: str) -> str:
-        # Separate optional metadata header from body
-        header, body = self._split_metadata(transcript_text)
-        cleaned = self._remove_timestamps(body)
-        cleaned = self._remove_fillers(cleaned)
-        cleaned = self._normalize_whitespace(cleaned)
-        return f"{header}{cleaned}"
+        with tool_span(self.name, input_chars=len(transcript_text)):
+            # Separate optional metadata header from body
+            header, body = self._split_metadata(transcript_text)
+            # Clean line by line instead of running every regex over the whole body
+            cleaned = "".join(clean_segments(iter_lines(body)))
+            self._index_for_duplicates(header, cleaned)
+            return f"{header}{cleaned}"
 
+    def _index_for_duplicates(self, header: str, cleaned: str) -> None:
+        # near-duplicate index keyed by video id; a failure here must not break cleaning
+        video_id = parse_metadata_header(header).get("Video ID")
+        if not video_id or cleaned.lstrip().startswith("Error"):
+            return
+        try:
+            get_duplicate_index().add(video_id, cleaned)
+        except Exception as e:
+            logger.warning(f"Could not index transcript of {video_id} for duplicate detection: {e}")
@@ -1,12 +1,47 @@
 from crewai.tools import BaseTool
 from youtube_transcript_api import YouTubeTranscriptApi
 from urllib.parse import urlparse, parse_qs
-from typing import Optional, Dict, Any, ClassVar, List
+from typing import Optional, Dict, Any, ClassVar, List, Tuple, Iterable
+from collections import OrderedDict
 import logging
+import threading
 import requests
 
+from ..pipeline import iter_lines, iter_segment_texts
+from ..tracing import tool_span
+
 logger = logging.getLogger(__name__)
 
+class _TranslationCache:
+    """Thread-safe LRU of youtube translations, bounded by the total characters of their text."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.chars = 0
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple[str, str], entry: Dict[str, Any]) -> None:
+        size = len(entry['text'])
+        if size > self.max_chars:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.chars -= len(previous['text'])
+            self._entries[key] = entry
+            self.chars += size
+            while self.chars > self.max_chars:
+                _, evicted = self._entries.popitem(last=False)
+                self.chars -= len(evicted['text'])
+
 class EnhancedTranscriptTool(BaseTool):
     name: str = "youtube transcript extractor"
     description: str = "gets youtube video transcripts with language support"
@@ -16,6 +51,11 @@ class EnhancedTranscriptTool(BaseTool):
         'en', 'es', 'fr', 'de', 'it', 'pt', 'zh', 'ja', 'ko', 'ru', 'ar', 'hi'
     ]
 
+    # youtube translations keyed by (video_id, requested language), shared by all tool
+    # instances in the process; bounded by characters since transcripts can be megabytes
+    TRANSLATION_CACHE_MAX_CHARS: ClassVar[int] = 8_000_000
+    _translation_cache: ClassVar[Any] = _TranslationCache(TRANSLATION_CACHE_MAX_CHARS)
+
     def _get_video_id(self, url: str) -> Optional[str]:
         """Extract video ID from various YouTube URL formats."""
         try:
@@ -33,18 +73,21 @@ class EnhancedTranscriptTool(BaseTool):
             logger.error(f"Error parsing URL {url}: {e}")
         return None
 
-    def _get_available_languages(self, video_id: str) -> Dict[str, Any]:
-        """Get all available transcript languages for a video."""
+    def _get_available_languages(self, video_id: str, transcript_list=None) -> Dict[str, Any]:
+        """Get all available transcript languages for a video (from transcript_list if already listed)."""
         try:
-            api = YouTubeTranscriptApi()
-            transcript_list = api.list(video_id)
+            if transcript_list is None:
+                transcript_list = YouTubeTranscriptApi().list(video_id)
             languages: Dict[str, Any] = {}
             for transcript in transcript_list:
                 languages[transcript.language_code] = {
                     'language': transcript.language,
                     'language_code': transcript.language_code,
                     'is_generated': transcript.is_generated,
-                    'is_translatable': hasattr(transcript, 'is_translatable') and transcript.is_translatable
+                    'is_translatable': hasattr(transcript, 'is_translatable') and transcript.is_translatable,
+                    'translation_languages': {
+                        t.language_code: t.language for t in getattr(transcript, 'translation_languages', [])
+                    }
                 }
             return languages
         except Exception as e:
@@ -69,6 +112,58 @@ class EnhancedTranscriptTool(BaseTool):
                     return lang_code
         return list(available_languages.keys())[0] if available_languages else None
 
+    def _match_language(self, language_codes, preferred_language: str) -> Optional[str]:
+        """Exact match first, then a prefix match (e.g. 'zh' -> 'zh-Hans')."""
+        if preferred_language in language_codes:
+            return preferred_language
+        for lang_code in language_codes:
+            if lang_code.startswith(preferred_language):
+                return lang_code
+        return None
+
+    def _select_translation_source(self, available_languages: Dict[str, Any], target_language: str) -> Optional[Tuple[str, str]]:
+        """Pick a transcript youtube can translate into target_language.
+
+        Manually created transcripts are preferred over auto-generated ones, then the
+        usual language priorities apply. Returns (source_code, target_code) or None.
+        """
+        candidates = []
+        for lang_code, info in available_languages.items():
+            if not info.get('is_translatable'):
+                continue
+            target_code = self._match_language(info.get('translation_languages', {}), target_language)
+            if target_code:
+                candidates.append((lang_code, target_code, info['is_generated']))
+        if not candidates:
+            return None
+
+        def rank(candidate):
+            lang_code, _, is_generated = candidate
+            priority = next(
+                (i for i, p in enumerate(self.LANGUAGE_PRIORITIES) if lang_code.startswith(p)),
+                len(self.LANGUAGE_PRIORITIES)
+            )
+            return (is_generated, priority)
+
+        source_code, target_code, _ = min(candidates, key=rank)
+        return source_code, target_code
+
+    def _fetch_translated(self, video_id: str, language: str, transcript_list, source_code: str, target_code: str) -> Dict[str, Any]:
+        """Fetch youtube's translation of a transcript and cache it under the requested language."""
+        source = next(t for t in transcript_list if t.language_code == source_code)
+        translated = source.translate(target_code)
+        entry = {
+            'text': "\n".join(iter_segment_texts(translated.fetch())),
+            'language': translated.language,
+            'language_code': target_code,
+            'source_language': source.language,
+            'source_language_code': source_code,
+            'source_is_generated': source.is_generated,
+        }
+
+        self._translation_cache.put((video_id, language), entry)
+        return entry
+
     def _fetch_oembed_metadata(self, url: str) -> Dict[str, Any]:
         """Fetch basic metadata (title, author) using YouTube oEmbed (no API key)."""
         try:
@@ -88,26 +183,56 @@ class EnhancedTranscriptTool(BaseTool):
             logger.warning(f"oEmbed metadata fetch failed: {e}")
         return {"title": None, "author": None, "provider": None}
 
-    def _run(self, url: str, language: Optional[str] = None) -> str:
-        """Extract transcript with language support and prepend metadata header."""
+    def _open_transcript(self, url: str, language: Optional[str] = None,
+                         transcript_list=None) -> Tuple[str, Iterable[str]]:
+        """Resolve language/translation and fetch the transcript.
+
+        Returns the metadata header and an iterator over segment texts. Raises
+        ValueError with a user-facing message when no transcript can be found.
+        Pass transcript_list if the video's transcripts were already listed.
+        """
         video_id = self._get_video_id(url)
         if not video_id:
-            return "Error: Invalid YouTube URL format."
+            raise ValueError("Invalid YouTube URL format.")
 
-        try:
-            # Get available languages
-            available_languages = self._get_available_languages(video_id)
+        # a translation fetched earlier needs no network call at all
+        translation = self._translation_cache.get((video_id, language)) if language else None
+        
+        if translation is None:
+            # Get available languages (one listing call, reused for the fetch below)
+            if transcript_list is None:
+                try:
+                    transcript_list = YouTubeTranscriptApi().list(video_id)
+                except Exception as e:
+                    logger.error(f"Error getting available languages: {e}")
+                    raise ValueError("No transcripts available for this video.")
+            available_languages = self._get_available_languages(video_id, transcript_list)
             if not available_languages:
-                return "Error: No transcripts available for this video."
+                raise ValueError("No transcripts available for this video.")
             
+            # Requested language missing: let youtube translate instead of the LLM
+            if language and not self._match_language(available_languages, language):
+                source = self._select_translation_source(available_languages, language)
+                if source:
+                    translation = self._fetch_translated(video_id, language, transcript_list, *source)
+                else:
+                    logger.warning(f"No transcript in or translatable to '{language}' for {video_id}, using best available")
+        
+        if translation:
+            segments = iter_lines(translation['text'])
+            language_line = f"{translation['language']} ({translation['language_code']})"
+            is_generated = translation['source_is_generated']
+            translated_line = (
+                f"Translated: Yes, by YouTube from {translation['source_language']} "
+                f"({translation['source_language_code']})"
+            )
+        else:
             # Select best language
             selected_language = self._select_best_language(available_languages, language)
             if not selected_language:
-                return "Error: Could not find suitable transcript language."
+                raise ValueError("Could not find suitable transcript language.")
             
             # Get transcript
-            api = YouTubeTranscriptApi()
-            transcript_list = api.list(video_id)
             transcript = None
             for t in transcript_list:
                 if t.language_code == selected_language:
@@ -115,30 +240,80 @@ class EnhancedTranscriptTool(BaseTool):
                     break
             
             if not transcript:
-                return "Error: Could not find transcript for selected language."
+                raise ValueError("Could not find transcript for selected language.")
             
-            fetched = transcript.fetch()
-            transcript_text = "\n".join([segment.text for segment in fetched])
-
-            # oEmbed metadata
-            meta = self._fetch_oembed_metadata(url)
+            segments = iter_segment_texts(transcript.fetch())
             language_info = available_languages[selected_language]
+            language_line = f"{language_info['language']} ({selected_language})"
+            is_generated = language_info['is_generated']
+            translated_line = "Translated: No"
+
+        # oEmbed metadata
+        meta = self._fetch_oembed_metadata(url)
+
+        # Build metadata header
+        metadata_lines = [
+            "# Video Metadata",
+            f"Title: {meta.get('title') or 'Unknown'}",
+            f"Channel: {meta.get('author') or 'Unknown'}",
+            f"URL: {url}",
+            f"Video ID: {video_id}",
+            f"Transcript Language: {language_line}",
+            translated_line,
+            f"Auto-generated: {'Yes' if is_generated else 'No'}",
+            "",
+            "---",
+            "",
+        ]
+        return "\n".join(metadata_lines), segments
 
-            # Build metadata header
-            metadata_lines = [
-                "# Video Metadata",
-                f"Title: {meta.get('title') or 'Unknown'}",
-                f"Channel: {meta.get('author') or 'Unknown'}",
-                f"URL: {url}",
-                f"Video ID: {video_id}",
-                f"Transcript Language: {language_info['language']} ({selected_language})",
-                f"Auto-generated: {'Yes' if language_info['is_generated'] else 'No'}",
-                "",
-                "---",
-                "",
-            ]
-            header = "\n".join(metadata_lines)
-            return header + transcript_text
+    def fetch_segments_since(self, url: str, watermark: float, language: Optional[str] = None) -> Tuple[List[Any], float]:
+        """Segments that start after watermark (seconds) and the new watermark.
+
+        For live streams and premieres whose transcript is still growing. YouTube has no
+        delta API, so the caption list is refetched, but only new segments are returned.
+        Raises ValueError if the requested language is neither available nor translatable.
+        """
+        video_id = self._get_video_id(url)
+        if not video_id:
+            raise ValueError("Invalid YouTube URL format.")
+
+        # captions for live streams can appear a while after the stream starts
+        try:
+            transcript_list = YouTubeTranscriptApi().list(video_id)
+        except Exception as e:
+            logger.warning(f"No transcripts listed for {video_id} yet: {e}")
+            return [], watermark
+        available_languages = self._get_available_languages(video_id, transcript_list)
+        if not available_languages:
+            return [], watermark
+
+        # a missing language is translated like in _open_transcript, never silently swapped for another
+        if language and not self._match_language(available_languages, language):
+            source = self._select_translation_source(available_languages, language)
+            if not source:
+                raise ValueError(f"No transcript in or translatable to '{language}' for this stream.")
+            source_code, target_code = source
+            transcript = next(t for t in transcript_list if t.language_code == source_code).translate(target_code)
+        else:
+            selected_language = self._select_best_language(available_languages, language)
+            transcript = next(t for t in transcript_list if t.language_code == selected_language)
+
+        # the growing transcript is refetched on every poll, so translations aren't cached
+        fetched = transcript.fetch()
+        new_segments = [segment for segment in fetched if segment.start > watermark]
+        if new_segments:
+            watermark = max(segment.start for segment in new_segments)
+        return new_segments, watermark
+
+    def _run(self, url: str, language: Optional[str] = None) -> str:
+        """Extract transcript with language support and prepend metadata header."""
+        try:
+            with tool_span(self.name, url=url, language=language):
+                header, segments = self._open_transcript(url, language)
+                return header + "\n".join(segments)
+        except ValueError as e:
+            return f"Error: {e}"
         except Exception as e:
             logger.error(f"Error extracting transcript: {e}")
             return f"Error extracting transcript: {str(e)}"
@@ -0,0 +1,280 @@
+"""Per-job traces of crew tasks, tool calls and pipeline steps, plus optional profiling.
+
+Each job appends JSON lines to TRACE_DIR/<job_id>.jsonl as events happen, so a trace
+survives crashes and restarts (a resumed job keeps appending to the same file).
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+TRACE_DIR = os.getenv('TRACE_DIR', 'traces')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+PROFILERS = ('cprofile', 'sampling')
+# seconds between stack samples for the sampling profiler
+SAMPLE_INTERVAL = 0.01
+
+USAGE_FIELDS = ('prompt_tokens', 'completion_tokens', 'cached_prompt_tokens', 'total_tokens', 'successful_requests')
+
+_current_trace: ContextVar[Optional["JobTrace"]] = ContextVar('current_trace', default=None)
+
+
+def current_trace() -> Optional["JobTrace"]:
+    """Trace of the job running in this context, if any."""
+    return _current_trace.get()
+
+
+def _agent_usage(agent) -> Dict[str, int]:
+    token_process = getattr(agent, '_token_process', None)
+    if token_process is None:
+        return {field: 0 for field in USAGE_FIELDS}
+    summary = token_process.get_summary()
+    return {field: getattr(summary, field, 0) for field in USAGE_FIELDS}
+
+
+class JobTrace:
+    """Structured trace for one job, written as JSONL."""
+
+    def __init__(self, job_id: str, trace_dir: Optional[str] = None):
+        self.job_id = job_id
+        self.path = os.path.join(trace_dir or TRACE_DIR, f"{job_id}.jsonl")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._agents: Dict[str, Any] = {}
+        self._usage: Dict[str, Dict[str, int]] = {}
+        self._executions: Dict[str, int] = {}
+        self._task_started = time.monotonic()
+        self._steps = 0
+
+    def record(self, event: str, **fields) -> None:
+        entry = {'job_id': self.job_id, 'event': event, 'timestamp': datetime.now().isoformat()}
+        entry.update(fields)
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    @contextmanager
+    def activate(self):
+        """Make this the current trace so tools can record into it."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **fields):
+        """Record how long a pipeline step took, and whether it failed."""
+        started = time.monotonic()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.record('span', name=name, latency_ms=round((time.monotonic() - started) * 1000, 1),
+                        error=error, **fields)
+
+    def instrument(self, crew) -> None:
+        """Record a 'task' event (tokens, LLM calls, retries, latency) after every task of the crew.
+
+        Token counts come from each agent's running totals, so per-task numbers are the
+        difference since the previous snapshot. Tasks run sequentially, which makes the
+        time since the previous task finished that task's latency.
+        """
+        for agent in crew.agents:
+            self._agents[agent.role] = agent
+            self._usage[agent.role] = _agent_usage(agent)
+            self._executions[agent.role] = getattr(agent, '_times_executed', 0)
+        self._task_started = time.monotonic()
+        self._steps = 0
+
+        previous_task_callback = crew.task_callback
+        previous_step_callback = crew.step_callback
+
+        def on_step(step):
+            self._steps += 1
+            if previous_step_callback:
+                previous_step_callback(step)
+
+        def on_task(output):
+            self._record_task(output)
+            if previous_task_callback:
+                previous_task_callback(output)
+
+        crew.step_callback = on_step
+        crew.task_callback = on_task
+
+    def _record_task(self, output) -> None:
+        now = time.monotonic()
+        role = output.agent
+        agent = self._agents.get(role)
+        usage = _agent_usage(agent) if agent else {field: 0 for field in USAGE_FIELDS}
+        before = self._usage.get(role, {field: 0 for field in USAGE_FIELDS})
+        delta = {field: usage[field] - before.get(field, 0) for field in USAGE_FIELDS}
+        executions = getattr(agent, '_times_executed', 0) if agent else 0
+        self.record(
+            'task',
+            task=output.name,
+            agent=role,
+            latency_ms=round((now - self._task_started) * 1000, 1),
+            prompt_tokens=delta['prompt_tokens'],
+            completion_tokens=delta['completion_tokens'],
+            cached_prompt_tokens=delta['cached_prompt_tokens'],
+            total_tokens=delta['total_tokens'],
+            llm_calls=delta['successful_requests'],
+            agent_steps=self._steps,
+            retries=executions - self._executions.get(role, 0),
+            output_chars=len(output.raw or ''),
+        )
+        self._usage[role] = usage
+        self._executions[role] = executions
+        self._task_started = now
+        self._steps = 0
+
+
+@contextmanager
+def tool_span(tool_name: str, **fields):
+    """Time a tool call into the current job's trace; a no-op outside a traced job."""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    with trace.span(f"tool:{tool_name}", **fields):
+        yield
+
+
+def read_trace(job_id: str, trace_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    path = os.path.join(trace_dir or TRACE_DIR, f"{job_id}.jsonl")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize_trace(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-agent, per-task and per-span totals of a job's trace events."""
+    totals_template = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0,
+                       'llm_calls': 0, 'retries': 0, 'latency_ms': 0.0, 'count': 0}
+    by_agent: Dict[str, Dict[str, Any]] = {}
+    by_task: Dict[str, Dict[str, Any]] = {}
+    spans: Dict[str, Dict[str, Any]] = {}
+
+    for event in events:
+        if event['event'] == 'task':
+            for key, bucket in ((event.get('agent'), by_agent), (event.get('task'), by_task)):
+                totals = bucket.setdefault(key or 'unknown', dict(totals_template))
+                for field in ('prompt_tokens', 'completion_tokens', 'total_tokens', 'llm_calls', 'retries', 'latency_ms'):
+                    totals[field] += event.get(field, 0)
+                totals['count'] += 1
+        elif event['event'] == 'span':
+            totals = spans.setdefault(event['name'], {'latency_ms': 0.0, 'count': 0, 'errors': 0})
+            totals['latency_ms'] += event.get('latency_ms', 0)
+            totals['count'] += 1
+            totals['errors'] += 1 if event.get('error') else 0
+
+    return {'agents': by_agent, 'tasks': by_task, 'spans': spans}
+
+
+class _StackSampler:
+    """Minimal sampling profiler: periodically records one thread's stack as collapsed frames."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format flamegraph tools read ('frame;frame count')."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profile_path(job_id: str, profile_dir: Optional[str] = None) -> str:
+    """Human-readable profile report for a job."""
+    return os.path.join(profile_dir or PROFILE_DIR, f"{job_id}.txt")
+
+
+@contextmanager
+def profile_job(job_id: str, profiler: Optional[str], trace: Optional[JobTrace] = None):
+    """Profile the Python side of the wrapped block with cProfile or the stack sampler.
+
+    Writes PROFILE_DIR/<job_id>.txt (readable report) plus the raw .prof (cProfile) or
+    .collapsed (sampling) file. Profiles only the calling thread, i.e. the job's thread.
+    """
+    if not profiler:
+        yield
+        return
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}', expected one of {', '.join(PROFILERS)}")
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    report_path = profile_path(job_id)
+    started = time.monotonic()
+
+    if profiler == 'cprofile':
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            raw_path = os.path.join(PROFILE_DIR, f"{job_id}.prof")
+            profile.dump_stats(raw_path)
+            report = io.StringIO()
+            pstats.Stats(profile, stream=report).sort_stats('cumulative').print_stats(60)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(report.getvalue())
+            if trace:
+                trace.record('profile', profiler=profiler, report=report_path, raw=raw_path,
+                             duration_ms=round((time.monotonic() - started) * 1000, 1))
+    else:
+        sampler = _StackSampler(threading.get_ident())
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            raw_path = os.path.join(PROFILE_DIR, f"{job_id}.collapsed")
+            collapsed = sampler.collapsed()
+            with open(raw_path, 'w', encoding='utf-8') as f:
+                f.write(collapsed)
+            total = sum(sampler.samples.values())
+            with open(report_path, 'w', encoding='utf-8') as f:
+                f.write(f"{total} samples every {sampler.interval * 1000:.0f} ms, hottest stacks first\n\n")
+                f.write(''.join(collapsed.splitlines(keepends=True)[:60]))
+            if trace:
+                trace.record('profile', profiler=profiler, report=report_path, raw=raw_path, samples=total,
+                             duration_ms=round((time.monotonic() - started) * 1000, 1))
@@ -0,0 +1,188 @@
+"""Out-of-process job execution: a recycled pool of worker processes.
+
+Each job runs in a worker process, so a crash, a leak or a long CPU-bound step in one
+job can't take down or stall the web process. Workers are spawned (no forked locks or
+sqlite connections), and the pool is swapped for a fresh one after every
+processes * max_jobs_per_worker jobs to bound memory growth; the old pool finishes its
+running jobs and exits. (max_tasks_per_child would be finer-grained, but on Python 3.11
+the pool stalls once a worker retires.)
+Jobs report progress through a multiprocessing queue that a relay thread in the parent
+turns back into on_event calls. Live jobs don't belong here: they hold a worker for a
+whole stream, so the web app runs them on threads.
+
+When a worker dies the whole pool breaks and every job in it fails. Workers announce
+which job they are running, so only the job whose worker died is charged an attempt;
+the others are resubmitted for free.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait
+from typing import Any, Callable, Optional, Dict, Set
+
+from .jobs import run_job
+
+logger = logging.getLogger(__name__)
+
+# internal event: a worker process picked up a job
+STARTED_EVENT = '_worker_started'
+# resubmits a job gets for pools broken by other jobs' crashes
+MAX_FREE_RETRIES = 5
+# how long to wait for a crashed worker's exit to become visible
+DEATH_TIMEOUT = 1.0
+
+# set in each worker process by _init_worker
+_event_queue = None
+
+
+def _init_worker(event_queue) -> None:
+    global _event_queue
+    _event_queue = event_queue
+
+
+def _emit(event: str, data: dict) -> None:
+    _event_queue.put((event, data))
+
+
+def _run_in_worker(job_id: str) -> None:
+    # SimpleQueue writes synchronously, so the parent learns the pid even if this worker dies next
+    _event_queue.put((STARTED_EVENT, {'job_id': job_id, 'pid': os.getpid()}))
+    run_job(job_id, _emit)
+
+
+class WorkerPool:
+    """Runs stored jobs in worker processes and relays their events to this process.
+
+    on_event(event, data) is called from the relay thread for every event a job emits.
+    on_done(job_id, error) is called once per job; error is set when the job could not
+    finish (its runner raised, or its own worker died max_attempts times). A job whose
+    pool broke is resubmitted on a fresh pool, where it resumes from its checkpoints.
+    """
+
+    def __init__(self, on_event: Callable[[str, dict], None],
+                 on_done: Optional[Callable[..., None]] = None,
+                 processes: int = 2, max_jobs_per_worker: int = 20, max_attempts: int = 2):
+        self.on_event = on_event
+        self.on_done = on_done
+        self.processes = processes
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_attempts = max_attempts
+        self._context = multiprocessing.get_context('spawn')
+        self._events = self._context.SimpleQueue()
+        self._lock = threading.Lock()
+        # per job: worker pid, crashes of its own worker, and resubmits caused by other jobs
+        self._pids: Dict[str, int] = {}
+        # worker processes by pid, remembered so crashes can be pinned on one of them
+        self._workers: Dict[int, Any] = {}
+        self._crashes: Dict[str, int] = {}
+        self._free_retries: Dict[str, int] = {}
+        self._submitted = 0
+        self._executor = self._new_executor()
+        self._relay = threading.Thread(target=self._relay_events, daemon=True)
+        self._relay.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._events,)
+        )
+
+    def submit(self, job_id: str) -> None:
+        with self._lock:
+            if self._submitted >= self.processes * self.max_jobs_per_worker:
+                self._recycle()
+            self._submitted += 1
+            executor = self._executor
+            try:
+                future = executor.submit(_run_in_worker, job_id)
+            except BrokenProcessPool:
+                # a worker died since the last submit and nothing has noticed yet
+                executor = self._replace_executor(executor)
+                future = executor.submit(_run_in_worker, job_id)
+            self._remember_workers(executor)
+        future.add_done_callback(lambda f: self._finished(job_id, executor, f))
+
+    def _recycle(self) -> None:
+        # caller holds the lock; running jobs keep their workers until they finish
+        logger.info("Recycling worker processes")
+        self._executor.shutdown(wait=False)
+        self._executor = self._new_executor()
+        self._submitted = 0
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        # caller holds the lock; jobs of the same broken pool only replace it once
+        if self._executor is broken:
+            logger.warning("Worker process died, starting a new pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            self._submitted = 0
+        return self._executor
+
+    def _remember_workers(self, executor: ProcessPoolExecutor) -> None:
+        # caller holds the lock; the executor only exposes its processes privately and drops
+        # them on shutdown, so keep our own references (dead ones are pruned here)
+        self._workers = {pid: process for pid, process in self._workers.items() if process.exitcode is None}
+        self._workers.update(getattr(executor, '_processes', None) or {})
+
+    def _dead_pids(self) -> Set[int]:
+        # a broken pool fails its futures before terminating the surviving workers,
+        # so the only sentinels that fire are those of workers that actually died
+        with self._lock:
+            sentinels = {process.sentinel: pid for pid, process in self._workers.items()}
+        if not sentinels:
+            return set()
+        return {sentinels[sentinel] for sentinel in wait(list(sentinels), timeout=DEATH_TIMEOUT)}
+
+    def _finished(self, job_id: str, executor: ProcessPoolExecutor, future) -> None:
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            dead = self._dead_pids()
+            with self._lock:
+                pid = self._pids.pop(job_id, None)
+                self._replace_executor(executor)
+                # unknown dead pids: charge every started job rather than none
+                if pid is not None and (pid in dead or not dead):
+                    crashes = self._crashes[job_id] = self._crashes.get(job_id, 0) + 1
+                    retry = crashes < self.max_attempts
+                    message = f"Worker process died {crashes} times while running this job"
+                else:
+                    free = self._free_retries[job_id] = self._free_retries.get(job_id, 0) + 1
+                    crashes = None
+                    retry = free <= MAX_FREE_RETRIES
+                    message = "Worker pool kept breaking while this job was queued or running"
+            if retry:
+                reason = "its worker died" if crashes else "another job's worker died"
+                logger.warning(f"Job {job_id} failed because {reason}, resubmitting")
+                self.submit(job_id)
+                return
+        else:
+            message = str(error) if error else None
+
+        with self._lock:
+            self._pids.pop(job_id, None)
+            self._crashes.pop(job_id, None)
+            self._free_retries.pop(job_id, None)
+        if self.on_done:
+            self.on_done(job_id, message)
+
+    def _relay_events(self) -> None:
+        while True:
+            event, data = self._events.get()
+            if event == STARTED_EVENT:
+                with self._lock:
+                    self._pids[data['job_id']] = data['pid']
+                continue
+            try:
+                self.on_event(event, data)
+            except Exception as e:
+                logger.error(f"Failed to relay {event}: {e}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._executor.shutdown(wait=wait)
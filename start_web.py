@@ -8,12 +8,14 @@ os.chdir(script_dir)
 sys.path.insert(0, script_dir)
 
 if __name__ == '__main__':
-    from web_app import app, socketio
+    from web_app import app, socketio, resume_pending_jobs
     
     print("starting youtube summarizer...")
     print("go to: http://localhost:8080")
     print("ctrl+c to stop")
     
+    resume_pending_jobs()
+    
     try:
         socketio.run(app, host='0.0.0.0', port=8080, debug=False, allow_unsafe_werkzeug=True)
     except KeyboardInterrupt:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""OpenAI-compatible stub model endpoint with configurable latency and error rate.
+
+For exercising per-agent model routing locally without spending tokens, e.g.
+
+    python stub_llm_server.py --port 9001 --latency 12 --error-rate 0.3   # slow, flaky primary
+    python stub_llm_server.py --port 9002 --latency 0.2                   # fast fallback
+
+then point an agent's `model` block in config/agents.yaml at them (see the comment there).
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(args):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+
+            time.sleep(max(0.0, random.gauss(args.latency, args.jitter)))
+            if random.random() < args.error_rate:
+                self._send(500, {'error': {'message': 'stub: injected failure', 'type': 'server_error'}})
+                return
+
+            prompt_chars = sum(len(str(m.get('content', ''))) for m in request.get('messages', []))
+            self._send(200, {
+                'id': f"chatcmpl-{uuid.uuid4().hex}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': f"Thought: I now know the final answer\nFinal Answer: {args.reply}"},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_chars // 4,
+                    'completion_tokens': len(args.reply) // 4,
+                    'total_tokens': prompt_chars // 4 + len(args.reply) // 4,
+                },
+            })
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *log_args):
+            if not args.quiet:
+                super().log_message(format, *log_args)
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions endpoint")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Std deviation of the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--reply", default="# Summary\n- stub response", help="Final answer text to return")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args))
+    print(f"stub model on http://127.0.0.1:{args.port}/v1 (latency {args.latency}s, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
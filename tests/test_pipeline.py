@@ -0,0 +1,90 @@
+import random
+import re
+
+import pytest
+
+from youtube_summarizer.pipeline import clean_segments, iter_lines, split_metadata
+
+
+# the whole-text cleaner that clean_segments replaced, kept verbatim as the reference
+def remove_timestamps(text):
+    patterns = [
+        r"\b\d{1,2}:\d{2}(?::\d{2})?\b",
+        r"\[\d{1,2}:\d{2}(?::\d{2})?\]",
+        r"\(\d{1,2}:\d{2}(?::\d{2})?\)",
+    ]
+    for p in patterns:
+        text = re.sub(p, "", text)
+    return text
+
+
+def remove_fillers(text):
+    fillers = [
+        r"\bum\b", r"\buh\b", r"\blike\b", r"\byou know\b", r"\bsort of\b",
+        r"\bkinda\b", r"\ber\b", r"\bem\b"
+    ]
+    for f in fillers:
+        text = re.sub(f, "", text, flags=re.IGNORECASE)
+    return text
+
+
+def normalize_whitespace(text):
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
+    text = re.sub(r"\.\s+", ".\n", text)
+    return text.strip() + "\n"
+
+
+def reference_clean(text):
+    return normalize_whitespace(remove_fillers(remove_timestamps(text)))
+
+
+WORDS = [
+    "um", "Um", "uh", "like", "likely", "you", "know", "you know", "sort", "of", "sort of",
+    "kinda", "er", "em", "term", "the", "video", "talks.", "end.", "...", "a.b", "3.5",
+    "00:12", "1:02:03", "[01:02]", "(0:15)", "[1:2]", "12:345", "x00:12", "café", "über.",
+]
+SEPARATORS = [" ", " ", " ", "  ", "\t", ""]
+
+
+def random_transcript(rng):
+    lines = []
+    for _ in range(rng.randint(0, 30)):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(0, 12))]
+        line = ""
+        for word in words:
+            line += word + rng.choice(SEPARATORS)
+        if rng.random() < 0.2:
+            line = " " + line
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def streamed(text):
+    return "".join(clean_segments(iter_lines(text)))
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "\n\n",
+    "um uh like",
+    "Hello there. 00:12 This is [01:02] a test.",
+    "first line\n\n\nsecond line.\nthird",
+    "you\nknow sort\nof",
+    "ends with a period.",
+])
+def test_matches_whole_text_cleaning(text):
+    assert streamed(text) == reference_clean(text)
+
+
+def test_matches_whole_text_cleaning_on_random_transcripts():
+    rng = random.Random(1234)
+    for _ in range(500):
+        text = random_transcript(rng)
+        assert streamed(text) == reference_clean(text), text
+
+
+def test_split_metadata_keeps_header():
+    header, body = split_metadata("# Video Metadata\nTitle: x\n---\nbody text")
+    assert header == "# Video Metadata\nTitle: x\n\n---\n\n"
+    assert body == "body text"
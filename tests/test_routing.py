@@ -0,0 +1,87 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+from crewai.utilities.exceptions.context_window_exceeding_exception import LLMContextLengthExceededException
+
+from youtube_summarizer.routing import MIN_SAMPLES, ModelRouter, ModelSpec, RoutedLLM
+
+
+class FakeDelegate:
+    """Stands in for a crewai LLM: answers with its name, or raises the given error."""
+
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.calls = 0
+        self.stop = None
+
+    def call(self, messages, *args, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return f"answer from {self.name}"
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def routed(router, primary_error=None):
+    candidates = [
+        ModelSpec('primary', max_latency_ms=1000, max_error_rate=0.2),
+        ModelSpec('fallback', max_latency_ms=1000, max_error_rate=0.2),
+    ]
+    llm = RoutedLLM(candidates, router)
+    llm._delegates = {'primary': FakeDelegate('primary', primary_error), 'fallback': FakeDelegate('fallback')}
+    return llm
+
+
+def test_healthy_primary_is_used():
+    llm = routed(ModelRouter())
+    assert llm.call("hi") == "answer from primary"
+    assert llm._delegates['fallback'].calls == 0
+
+
+def test_falls_back_when_primary_breaks_error_rate():
+    router = ModelRouter()
+    for _ in range(MIN_SAMPLES):
+        router.record('primary', 10, ok=False)
+    llm = routed(router)
+    assert llm.call("hi") == "answer from fallback"
+    assert llm._delegates['primary'].calls == 0
+
+
+def test_falls_back_when_primary_breaks_latency():
+    router = ModelRouter()
+    for _ in range(MIN_SAMPLES):
+        router.record('primary', 5000, ok=True)
+    llm = routed(router)
+    assert llm.call("hi") == "answer from fallback"
+    assert llm._delegates['primary'].calls == 0
+
+
+@pytest.mark.parametrize("error", [TimeoutError("timed out"), HTTPError(429), HTTPError(503)])
+def test_retryable_error_falls_through_and_counts(error):
+    router = ModelRouter()
+    llm = routed(router, primary_error=error)
+    assert llm.call("hi") == "answer from fallback"
+    stats = router.snapshot()
+    assert stats['primary']['calls'] == 1 and stats['primary']['error_rate'] == 1.0
+    assert stats['fallback']['error_rate'] == 0.0
+
+
+@pytest.mark.parametrize("error", [
+    LLMContextLengthExceededException("maximum context length is 128000 tokens"),
+    HTTPError(400),
+    HTTPError(401),
+])
+def test_non_retryable_error_is_raised_without_touching_stats(error):
+    router = ModelRouter()
+    llm = routed(router, primary_error=error)
+    with pytest.raises(type(error)):
+        llm.call("hi")
+    assert llm._delegates['fallback'].calls == 0
+    assert router.snapshot() == {}
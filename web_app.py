@@ -2,19 +2,34 @@
 
 import os
 import sys
+import gzip
+import hashlib
 import threading
 import logging
+import math
+import time
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session
 from flask_socketio import SocketIO, emit
 import uuid
 
 # add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from youtube_summarizer.crew import YouTubeSummarizer
+from youtube_summarizer.jobs import job_store, run_job, job_links, summary_text, completion_payload, LIVE_MIN_POLL_INTERVAL
+from youtube_summarizer.job_store import STAGES, MAX_ATTEMPTS
+from youtube_summarizer.worker import WorkerPool
+from youtube_summarizer.routing import default_router
+from youtube_summarizer.search_index import get_search_index
+from youtube_summarizer.prefetch import prefetch
+from youtube_summarizer.tracing import PROFILERS, profile_path, read_trace, summarize_trace
 from dotenv import load_dotenv
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -25,101 +40,107 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-pro
 
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-# keep track of running jobs
+# jobs started by this process (running in a thread or a worker process)
 active_jobs = {}
 
-class WebProgressCallback:
-    # sends progress updates via websocket
-    def __init__(self, job_id, socketio_instance):
-        self.job_id = job_id
-        self.socketio = socketio_instance
-        
-    def update_progress(self, step, message, progress_percent=None):
-        data = {
-            'job_id': self.job_id,
-            'step': step,
-            'message': message,
+# texts smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# "thread" runs jobs on daemon threads in this process, "process" in a pool of worker processes
+WORKER_MODE = os.getenv('WORKER_MODE', 'thread')
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', 2))
+# recycle a worker process after this many jobs to cap memory growth
+WORKER_MAX_JOBS = int(os.getenv('WORKER_MAX_JOBS', 20))
+
+worker_pool = None
+worker_pool_lock = threading.Lock()
+
+def emit_job_event(event, data):
+    # job events always go to the job's room
+    socketio.emit(event, data, room=data['job_id'])
+
+def job_finished(job_id, error=None):
+    # called when a job's thread or worker is done; error means the runner itself died
+    active_jobs.pop(job_id, None)
+    if error:
+        logger.error(f"Job {job_id} died in its worker: {error}")
+        job_store.update_status(job_id, 'failed', error)
+        emit_job_event('job_error', {
+            'job_id': job_id,
+            'error': error,
             'timestamp': datetime.now().isoformat()
-        }
-        if progress_percent is not None:
-            data['progress'] = progress_percent
-            
-        self.socketio.emit('progress_update', data, room=self.job_id)
-        logger.info(f"Progress update: {step} - {message}")
+        })
 
-def run_summarization(job_id, youtube_url, language=None, publish_to_gdocs=False, gdocs_title=None):
-    # run the actual summarization in background
-    progress_callback = WebProgressCallback(job_id, socketio)
-    
+def get_worker_pool():
+    # worker processes are only started once the first job needs them
+    global worker_pool
+    with worker_pool_lock:
+        if worker_pool is None:
+            worker_pool = WorkerPool(
+                on_event=emit_job_event,
+                on_done=job_finished,
+                processes=WORKER_PROCESSES,
+                max_jobs_per_worker=WORKER_MAX_JOBS
+            )
+        return worker_pool
+
+def run_job_thread(job_id):
     try:
-        progress_callback.update_progress("starting", "Starting summarization pipeline...", 5)
-        
-        # setup inputs
-        inputs = {
-            "youtube_url": youtube_url,
-            "language": language,
-            "publish_to_gdocs": publish_to_gdocs,
-            "gdocs_title": gdocs_title,
-        }
-        
-        # Initialize and run crew
-        progress_callback.update_progress("initializing", "Initializing AI agents...", 15)
-        crew = YouTubeSummarizer().crew()
-        
-        progress_callback.update_progress("extracting", "Extracting video transcript...", 25)
-        progress_callback.update_progress("processing", "Processing and cleaning transcript...", 45)
-        progress_callback.update_progress("summarizing", "Generating AI summary...", 65)
-        progress_callback.update_progress("reviewing", "Reviewing summary quality...", 75)
-        
-        result = crew.kickoff(inputs=inputs)
-        
-        progress_callback.update_progress("reading_files", "Reading generated files...", 90)
-        
-        # Read the generated files
-        transcript_content = ""
-        summary_content = ""
-        
-        try:
-            with open("transcript.md", "r", encoding="utf-8") as f:
-                transcript_content = f.read()
-        except FileNotFoundError:
-            transcript_content = "Transcript file not found."
-            
-        try:
-            with open("SUMMARY.md", "r", encoding="utf-8") as f:
-                summary_content = f.read()
-        except FileNotFoundError:
-            summary_content = "Summary file not found."
-        
-        # Emit completion
-        progress_callback.update_progress("completed", "Summarization completed successfully", 100)
-        
-        # Send results
-        socketio.emit('job_completed', {
-            'job_id': job_id,
-            'success': True,
-            'transcript': transcript_content,
-            'summary': summary_content,
-            'result': str(result) if result else "Completed successfully"
-        }, room=job_id)
-        
+        run_job(job_id, emit_job_event)
     except Exception as e:
-        logger.error(f"Error in summarization job {job_id}: {str(e)}")
-        socketio.emit('job_error', {
-            'job_id': job_id,
-            'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }, room=job_id)
+        job_finished(job_id, str(e))
+    else:
+        job_finished(job_id)
+
+def start_job(job_id):
+    # start background processing for a stored job
+    # a job that keeps taking the server down with it would be resumed forever, so count starts
+    attempts = job_store.record_attempt(job_id)
+    if attempts > MAX_ATTEMPTS:
+        logger.warning(f"Not resuming job {job_id}: already started {attempts - 1} times")
+        job_store.update_status(job_id, 'failed', f"Gave up after {attempts - 1} attempts")
+        return
+    # live jobs mostly sleep between polls for the whole stream, so they get a thread here
+    # instead of holding a pool worker (and the pool's recycling) hostage
+    live = job_store.get_job(job_id)['params'].get('live')
+    mode = 'thread' if live else WORKER_MODE
+    active_jobs[job_id] = {
+        'mode': mode,
+        'started_at': datetime.now()
+    }
+    if mode == 'process':
+        get_worker_pool().submit(job_id)
+        return
     
-    finally:
-        # Clean up job
-        if job_id in active_jobs:
-            del active_jobs[job_id]
+    thread = threading.Thread(target=run_job_thread, args=(job_id,))
+    thread.daemon = True
+    thread.start()
+
+def resume_pending_jobs():
+    # pick up jobs that were queued or running when the server last stopped
+    for job in job_store.pending_jobs():
+        if job['job_id'] in active_jobs:
+            continue
+        logger.info(f"Resuming job {job['job_id']} (was {job['status']})")
+        start_job(job['job_id'])
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/prefetch', methods=['POST'])
+def prefetch_video():
+    # called by the page as soon as a url is pasted: languages now, transcript warmed in the background
+    data = request.get_json()
+    if not data or not data.get('youtube_url'):
+        return jsonify({'error': 'YouTube URL is required'}), 400
+    try:
+        result = prefetch(data['youtube_url'], data.get('language'),
+                          list_languages=data.get('list_languages', True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
 @app.route('/process', methods=['POST'])
 def process_video():
     data = request.get_json()
@@ -127,23 +148,37 @@ def process_video():
     if not data or 'youtube_url' not in data:
         return jsonify({'error': 'YouTube URL is required'}), 400
     
+    profile = data.get('profile')
+    if profile and profile not in PROFILERS:
+        return jsonify({'error': f"profile must be one of: {', '.join(PROFILERS)}"}), 400
+    
+    poll_interval = data.get('poll_interval')
+    if poll_interval is not None:
+        # a live job polls youtube (and may call the llm) every interval, so keep it sane
+        try:
+            if isinstance(poll_interval, bool):
+                raise ValueError
+            poll_interval = float(poll_interval)
+        except (TypeError, ValueError):
+            poll_interval = None
+        if poll_interval is None or not math.isfinite(poll_interval) or poll_interval < LIVE_MIN_POLL_INTERVAL:
+            return jsonify({'error': f"poll_interval must be a number of seconds, at least {LIVE_MIN_POLL_INTERVAL}"}), 400
+    
     # Generate unique job ID
     job_id = str(uuid.uuid4())
     
     # Store job info
-    active_jobs[job_id] = {
-        'url': data['youtube_url'],
-        'status': 'queued',
-        'created_at': datetime.now()
-    }
+    job_store.create_job(job_id, {
+        'youtube_url': data['youtube_url'],
+        'language': data.get('language'),
+        'publish_to_gdocs': data.get('publish_to_gdocs', False),
+        'gdocs_title': data.get('gdocs_title'),
+        'live': bool(data.get('live', False)),
+        'poll_interval': poll_interval,
+        'profile': profile,
+    })
     
-    # Start background processing
-    thread = threading.Thread(
-        target=run_summarization,
-        args=(job_id, data['youtube_url'], data.get('language'), data.get('publish_to_gdocs', False), data.get('gdocs_title'))
-    )
-    thread.daemon = True
-    thread.start()
+    start_job(job_id)
     
     return jsonify({
         'job_id': job_id,
@@ -151,6 +186,125 @@ def process_video():
         'status': 'queued'
     })
 
+def text_response(text, mimetype='text/markdown'):
+    # compressed when the client accepts it; ETag/If-None-Match and Range handled by werkzeug
+    body = text.encode('utf-8')
+    etag = hashlib.sha1(body).hexdigest()
+    
+    # Range requests address the plain text bytes, so they are never compressed
+    encoding = None
+    if 'Range' not in request.headers and len(body) >= MIN_COMPRESS_SIZE:
+        offered = ['br', 'gzip'] if brotli else ['gzip']
+        encoding = request.accept_encodings.best_match(offered)
+    
+    if encoding == 'br':
+        body = brotli.compress(body)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=6)
+    
+    response = Response(body, mimetype=mimetype)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        etag = f"{etag}-{encoding}"
+    response.set_etag(etag)
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    job = job_store.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    checkpoints = job_store.get_checkpoints(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+        'youtube_url': job['params'].get('youtube_url'),
+        'completed_stages': [stage for stage in STAGES if stage in checkpoints],
+        'links': job_links(job_id),
+    })
+
+@app.route('/jobs/<job_id>/trace')
+def get_job_trace(job_id):
+    if not job_store.get_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    events = read_trace(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'summary': summarize_trace(events),
+        'events': events,
+    })
+
+@app.route('/jobs/<job_id>/profile')
+def get_job_profile(job_id):
+    path = profile_path(job_id)
+    if not job_store.get_job(job_id) or not os.path.exists(path):
+        return jsonify({'error': 'No profile for this job (start it with "profile": "cprofile" or "sampling")'}), 404
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        return text_response(f.read(), mimetype='text/plain')
+
+@app.route('/search')
+def search():
+    # ranked full-text search over every indexed video's metadata, transcript and summary
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    
+    started = time.monotonic()
+    results = get_search_index().search(query, limit)
+    for result in results:
+        if result['job_id']:
+            result['links'] = job_links(result['job_id'])
+    return jsonify({
+        'query': query,
+        'results': results,
+        'took_ms': round((time.monotonic() - started) * 1000, 2)
+    })
+
+@app.route('/models')
+def get_model_stats():
+    # rolling latency/error stats the router uses to pick models
+    return jsonify(default_router.snapshot())
+
+@app.route('/jobs/<job_id>/stop', methods=['POST'])
+def stop_job(job_id):
+    # ends a live job after its current poll; the summary so far is kept
+    job = job_store.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job['params'].get('live'):
+        return jsonify({'error': 'Only live jobs can be stopped'}), 400
+    if job['status'] not in ('queued', 'running'):
+        return jsonify({'error': f"Job is already {job['status']}"}), 409
+    
+    job_store.update_status(job_id, 'stopping')
+    return jsonify({'job_id': job_id, 'status': 'stopping'})
+
+@app.route('/jobs/<job_id>/summary')
+def get_job_summary(job_id):
+    summary = summary_text(job_store.get_checkpoints(job_id))
+    if summary is None:
+        return jsonify({'error': 'Summary not available'}), 404
+    return text_response(summary)
+
+@app.route('/jobs/<job_id>/transcript')
+def get_job_transcript(job_id):
+    transcript = job_store.get_checkpoint(job_id, 'transcript')
+    if transcript is None:
+        return jsonify({'error': 'Transcript not available'}), 404
+    return text_response(transcript)
+
 @socketio.on('connect')
 def on_connect():
     logger.info('Client connected')
@@ -167,6 +321,11 @@ def on_join_job(data):
         join_room(job_id)
         session['job_id'] = job_id
         logger.info(f'Client joined job room: {job_id}')
+        
+        # late joiners (reconnects, resumed jobs) still get the completion event
+        job = job_store.get_job(job_id)
+        if job and job['status'] == 'completed':
+            emit('job_completed', completion_payload(job_id, job_store.get_checkpoints(job_id)))
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
@@ -175,6 +334,10 @@ if __name__ == '__main__':
     # Determine if we're in production
     is_production = os.environ.get('RENDER') or os.environ.get('PORT')
     
+    # Pick up work interrupted by the last restart (only in the reloader's child in debug mode)
+    if is_production or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_pending_jobs()
+    
     # Run the app
     socketio.run(
         app, 